@@ -0,0 +1,189 @@
+"""A browser stand-in that speaks plain HTTP and parses the returned HTML.
+
+It implements the part of the Selenium WebDriver API the functional tests
+use (get, find_element(s) by id or tag name, click, send_keys, text, title,
+current_url), so the same user stories run without a real browser. Clicking
+a link follows it; clicking a submit button posts its form, including the
+CSRF token and cookies. Nothing is rendered, so layout checks need Selenium.
+"""
+from html.parser import HTMLParser
+from http.cookiejar import CookieJar
+from urllib.parse import urlencode, urljoin
+from urllib.request import HTTPCookieProcessor, build_opener
+
+
+class By:
+    ID = 'id'
+    TAG_NAME = 'tag name'
+
+
+class WebDriverException(Exception):
+    pass
+
+
+class NoSuchElementException(WebDriverException):
+    pass
+
+
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                 'link', 'meta', 'source', 'track', 'wbr'}
+
+
+class HttpElement:
+    def __init__(self, browser, tag: str, attrs: dict, parent=None):
+        self.browser = browser
+        self.tag_name = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.children = []
+        self.value = attrs.get('value', '')
+
+    def iter(self):
+        for child in self.children:
+            if isinstance(child, HttpElement):
+                yield child
+                yield from child.iter()
+
+    def find_element(self, by: str, value: str) -> 'HttpElement':
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(
+                f'Unable to locate element: {{"method":"{by}",'
+                f'"selector":"{value}"}}')
+        return elements[0]
+
+    def find_elements(self, by: str, value: str) -> list:
+        if by == By.ID:
+            return [e for e in self.iter() if e.attrs.get('id') == value]
+        if by == By.TAG_NAME:
+            return [e for e in self.iter() if e.tag_name == value]
+        raise WebDriverException(f'Unsupported locator {by}')
+
+    @property
+    def text(self) -> str:
+        parts = []
+
+        def collect(element):
+            if element.tag_name in ('script', 'style'):
+                return
+            for child in element.children:
+                if isinstance(child, HttpElement):
+                    collect(child)
+                else:
+                    parts.append(child)
+
+        collect(self)
+        return ' '.join(' '.join(parts).split())
+
+    def get_attribute(self, name: str):
+        return self.value if name == 'value' else self.attrs.get(name)
+
+    def send_keys(self, keys: str):
+        if self.tag_name == 'select':
+            # Like typing into a focused select: pick the matching option.
+            for option in self.find_elements(By.TAG_NAME, 'option'):
+                if option.text.lower().startswith(keys.lower()):
+                    self.value = option.attrs.get('value', option.text)
+                    return
+            return
+        self.value += keys
+
+    def click(self):
+        if self.tag_name == 'a' and self.attrs.get('href'):
+            self.browser.get(urljoin(self.browser.current_url,
+                                     self.attrs['href']))
+        elif self.attrs.get('type') == 'submit':
+            form = self.parent
+            while form is not None and form.tag_name != 'form':
+                form = form.parent
+            if form is None:
+                raise WebDriverException('Submit button outside a form')
+            self.browser.submit(form)
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self, browser):
+        super().__init__(convert_charrefs=True)
+        self.browser = browser
+        self.root = HttpElement(browser, '#document', {})
+        self.stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        element = HttpElement(self.browser, tag,
+                              {name: value or '' for name, value in attrs},
+                              self.stack[-1])
+        self.stack[-1].children.append(element)
+        if tag not in VOID_ELEMENTS:
+            self.stack.append(element)
+
+    def handle_endtag(self, tag):
+        # Closes unclosed children too, like a forgiving browser.
+        for depth in range(len(self.stack) - 1, 0, -1):
+            if self.stack[depth].tag_name == tag:
+                del self.stack[depth:]
+                return
+
+    def handle_data(self, data):
+        self.stack[-1].children.append(data)
+
+
+class HttpBrowser:
+    def __init__(self):
+        self.opener = build_opener(HTTPCookieProcessor(CookieJar()))
+        self.current_url = None
+        self.document = None
+
+    def get(self, url: str, data: dict = None):
+        body = urlencode(data, doseq=True).encode() if data is not None else None
+        with self.opener.open(url, body) as response:
+            self.current_url = response.geturl()
+            html = response.read().decode(
+                response.headers.get_content_charset() or 'utf-8')
+        builder = _TreeBuilder(self)
+        builder.feed(html)
+        builder.close()
+        self.document = builder.root
+
+    def submit(self, form: HttpElement):
+        form_id = form.attrs.get('id')
+        fields = list(form.iter())
+        if form_id:
+            fields += [element for element in self.document.iter()
+                       if element.attrs.get('form') == form_id]
+        data = {}
+        for field in fields:
+            name = field.attrs.get('name')
+            if not name or field.tag_name not in ('input', 'select',
+                                                  'textarea'):
+                continue
+            if field.attrs.get('type') in ('checkbox', 'radio') and \
+                    'checked' not in field.attrs:
+                continue
+            value = field.value
+            if field.tag_name == 'select' and not value:
+                options = field.find_elements(By.TAG_NAME, 'option')
+                selected = [o for o in options if 'selected' in o.attrs]
+                value = (selected or options)[0].attrs.get('value', '')
+            data.setdefault(name, []).append(value)
+        action = urljoin(self.current_url, form.attrs.get('action', ''))
+        if form.attrs.get('method', 'get').lower() == 'post':
+            self.get(action, data)
+        else:
+            self.get(f'{action}?{urlencode(data, doseq=True)}')
+
+    @property
+    def title(self) -> str:
+        titles = self.document.find_elements(By.TAG_NAME, 'title')
+        return titles[0].text if titles else ''
+
+    def find_element(self, by: str, value: str) -> HttpElement:
+        return self.document.find_element(by, value)
+
+    def find_elements(self, by: str, value: str) -> list:
+        return self.document.find_elements(by, value)
+
+    def set_window_size(self, width: int, height: int):
+        pass
+
+    def quit(self):
+        self.document = None
@@ -0,0 +1,107 @@
+"""Read-only JSON API for lists and items.
+
+Rows are read with values_list() and serialized straight from the tuples, so
+no model instances are built. Every endpoint takes ?fields= to select
+columns. Collections also take ?ids= for a batch fetch in one IN query, or
+page by id with ?after= and ?page_size=.
+"""
+from django.conf import settings
+from django.http import JsonResponse
+
+from lists.instrumentation import query_budget
+from lists.models import Item, List
+
+LIST_FIELDS = {'id': 'id', 'name': 'name', 'version': 'version',
+               'updated_at': 'updated_at'}
+ITEM_FIELDS = {'id': 'id', 'list': 'list_id', 'text': 'text',
+               'state': 'state', 'state_text': 'state_text', 'prio': 'prio',
+               'prio_text': 'prio_text', 'position': 'position',
+               'updated_at': 'updated_at'}
+
+
+def _error(message: str, status: int = 400) -> JsonResponse:
+    return JsonResponse({'error': message}, status=status)
+
+
+def _int_list(value: str) -> list:
+    return [int(part) for part in value.split(',') if part]
+
+
+def _fields(request, fields: dict) -> dict:
+    names = request.GET.get('fields')
+    if not names:
+        return fields
+    unknown = set(names.split(',')) - set(fields)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return {name: fields[name] for name in names.split(',')}
+
+
+def _rows(queryset, fields: dict) -> list:
+    names = list(fields)
+    return [dict(zip(names, row))
+            for row in queryset.values_list(*fields.values())]
+
+
+def _collection(request, queryset, fields: dict) -> JsonResponse:
+    max_size = settings.LISTS_MAX_PAGE_SIZE
+    try:
+        fields = _fields(request, fields)
+        ids = _int_list(request.GET['ids']) if 'ids' in request.GET else None
+        after = int(request.GET.get('after', 0))
+        size = int(request.GET.get('page_size', settings.LISTS_PAGE_SIZE))
+    except ValueError as error:
+        return _error(str(error))
+    if ids is not None:
+        if len(ids) > max_size:
+            return _error(f'At most {max_size} ids per request')
+        return JsonResponse({'results': _rows(queryset.filter(id__in=ids)
+                                                      .order_by('id'),
+                                              fields)})
+    size = max(1, min(size, max_size))
+    # The cursor needs the id even if it was not asked for.
+    rows = _rows(queryset.filter(id__gt=after).order_by('id')[:size + 1],
+                 {**fields, '_cursor': 'id'})
+    next_cursor = rows[size - 1]['_cursor'] if len(rows) > size else None
+    for row in rows:
+        del row['_cursor']
+    return JsonResponse({'results': rows[:size], 'next': next_cursor})
+
+
+def _detail(request, queryset, fields: dict, id: int) -> JsonResponse:
+    try:
+        fields = _fields(request, fields)
+    except ValueError as error:
+        return _error(str(error))
+    rows = _rows(queryset.filter(id=id), fields)
+    if not rows:
+        return _error('Not found', status=404)
+    return JsonResponse(rows[0])
+
+
+@query_budget(1)
+def lists(request):
+    return _collection(request, List.objects.all(), LIST_FIELDS)
+
+
+@query_budget(1)
+def list_detail(request, list_id: int):
+    return _detail(request, List.objects.all(), LIST_FIELDS, list_id)
+
+
+@query_budget(1)
+def items(request):
+    items = Item.objects.all()
+    try:
+        if 'list' in request.GET:
+            items = items.filter(list_id=int(request.GET['list']))
+        if 'state' in request.GET:
+            items = items.filter(state__in=_int_list(request.GET['state']))
+    except ValueError:
+        return _error('Invalid list or state filter')
+    return _collection(request, items, ITEM_FIELDS)
+
+
+@query_budget(1)
+def item_detail(request, item_id: int):
+    return _detail(request, Item.objects.all(), ITEM_FIELDS, item_id)
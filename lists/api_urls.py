@@ -0,0 +1,9 @@
+from django.urls import path
+from lists import api
+
+urlpatterns = [
+    path('lists/', api.lists, name='api_lists'),
+    path('lists/<int:list_id>/', api.list_detail, name='api_list_detail'),
+    path('items/', api.items, name='api_items'),
+    path('items/<int:item_id>/', api.item_detail, name='api_item_detail'),
+]
@@ -0,0 +1,60 @@
+"""Moving soft-deleted items out of the item table and back.
+
+Deleted items older than the retention window are copied to ArchivedItem and
+removed from Item in batches. Each batch is its own short transaction, so
+writers are never locked out for longer than one batch takes.
+"""
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from lists.models import ArchivedItem, Item
+
+ARCHIVED_FIELDS = ['id', 'text', 'list_id', 'state', 'prio', 'position',
+                   'updated_at']
+
+
+def archive_deleted(days: int, batch_size: int = 1000,
+                    pause: float = 0) -> int:
+    # updated_at is set by the delete, so it tells how long an item has
+    # been deleted.
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted = Item.objects.filter(state=Item.ItemState.DELETED,
+                                  updated_at__lt=cutoff)
+    archived = 0
+    while True:
+        with transaction.atomic():
+            rows = list(deleted.order_by('id')
+                               .values(*ARCHIVED_FIELDS)[:batch_size])
+            if not rows:
+                return archived
+            ArchivedItem.objects.bulk_create(
+                [ArchivedItem(**row) for row in rows])
+            # Deleted items are not shown, so the lists keep their version.
+            Item._base_manager.filter(
+                id__in=[row['id'] for row in rows]).delete()
+        archived += len(rows)
+        time.sleep(pause)
+
+
+def restore_archived(list_id: int = None, batch_size: int = 1000,
+                     pause: float = 0) -> int:
+    # Restored items stay deleted and start a new retention window.
+    items = ArchivedItem.objects.all()
+    if list_id is not None:
+        items = items.filter(list_id=list_id)
+    restored = 0
+    while True:
+        with transaction.atomic():
+            rows = list(items.order_by('id')
+                             .values(*ARCHIVED_FIELDS)[:batch_size])
+            if not rows:
+                return restored
+            Item.objects.bulk_create([Item(**row) for row in rows],
+                                     record_history=False)
+            ArchivedItem.objects.filter(
+                id__in=[row['id'] for row in rows]).delete()
+        restored += len(rows)
+        time.sleep(pause)
@@ -0,0 +1,4 @@
+from lists import async_views
+from lists.urls import url_patterns
+
+urlpatterns = url_patterns(async_views)
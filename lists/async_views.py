@@ -0,0 +1,93 @@
+"""ASGI-native versions of the hot list views.
+
+They use the async ORM so an ASGI server does not hand every request to the
+thread pool. Select them with ROOT_URLCONF = 'superlists.async_urls'; views
+without an async version here are shared with lists.views.
+
+The item export and the live event stream are not available here. Django
+4.1 iterates a streaming response inside the event loop, where the export's
+queries cannot run and the event stream's blocking waits would stall every
+other request, so both have to be served by a WSGI deployment.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponseBadRequest
+from django.shortcuts import redirect
+
+from lists import events
+from lists.instrumentation import query_budget
+from lists.models import Item, List
+from lists.views import (OVERVIEW, _items_table_key, _list_etag,
+                         _not_modified, _overview_validators, _page_params,
+                         _render_home, _render_items_table, _render_list,
+                         _set_validators, add_item_form, bulk_update_items,
+                         move_item, new_list_form, search_items)
+
+
+@query_budget(2)
+async def home_page(request):
+    try:
+        size, after, prefix = _page_params(request)
+    except ValueError:
+        return HttpResponseBadRequest('Invalid page_size or cursor')
+    etag, last_modified = _overview_validators(
+        await List.objects.aaggregate(**OVERVIEW))
+    response = _not_modified(request, etag, last_modified)
+    if response is None:
+        lists, next_cursor = await List.objects.with_item_counts().apage(
+            size, after=after, prefix=prefix)
+        response = _render_home(request, lists, next_cursor, size, prefix)
+    return _set_validators(response, etag, last_modified)
+
+async def _items_table(list_: List) -> str:
+    key = _items_table_key(list_)
+    items_table = await cache.aget(key)
+    if items_table is None:
+        items_table = _render_items_table(list_,
+                                          await list_.aitems_by_state())
+        await cache.aset(key, items_table,
+                         settings.LISTS_FRAGMENT_CACHE_TIMEOUT)
+    return items_table
+
+@query_budget(2)
+async def view_list(request, list_id: int):
+    list_ = await List.objects.aget(id=list_id)
+    etag = _list_etag(list_)
+    response = _not_modified(request, etag, list_.updated_at)
+    if response is None:
+        response = _render_list(request, list_, await _items_table(list_))
+    return _set_validators(response, etag, list_.updated_at)
+
+@query_budget(1)
+async def new_list(request):
+    list_ = await List.objects.acreate(name=request.POST['list_name'])
+    return redirect(f'/lists/{list_.id}/')
+
+@query_budget(3)
+async def add_item(request, list_id: int):
+    list_ = await List.objects.aget(id=list_id)
+    prio_ = int(request.POST.get('prio_id', Item.ItemPrio.LOW))
+    name = request.POST['item_text']
+    item = await Item.objects.acreate(text=name,
+                                      prio=prio_,
+                                      list=list_)
+    events.publish(list_.id, 'add', item=events.item_data(item))
+    return redirect(f'/lists/{list_.id}/')
+
+@query_budget(2)
+async def state_up(request, list_id: int, item_id: int):
+    if await Item.objects.astate_up(item_id, list_id):
+        events.publish(list_id, 'state_up', item_id=item_id)
+    return redirect(f'/lists/{list_id}/')
+
+@query_budget(2)
+async def state_down(request, list_id: int, item_id: int):
+    if await Item.objects.astate_down(item_id, list_id):
+        events.publish(list_id, 'state_down', item_id=item_id)
+    return redirect(f'/lists/{list_id}/')
+
+@query_budget(3)
+async def delete_item(request, list_id: int, item_id: int):
+    if await Item.objects.adelete_item(item_id, list_id):
+        events.publish(list_id, 'delete_item', item_id=item_id)
+    return redirect(f'/lists/{list_id}/')
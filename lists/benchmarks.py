@@ -0,0 +1,117 @@
+"""Helpers shared by the benchmark management commands.
+
+Benchmarks always run against a throwaway test database, so seeding never
+touches the configured one. The history log is written synchronously there,
+nothing is left buffered once the database is gone.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from lists import history
+from lists.models import Item, List
+
+
+@contextmanager
+def benchmark_database(name: str = None):
+    # `name` puts an SQLite test database in a file instead of in memory.
+    if name is not None:
+        connection.settings_dict['TEST']['NAME'] = name
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0,
+                                                  autoclobber=True,
+                                                  serialize=False)
+    try:
+        with override_settings(
+                LISTS_HISTORY_WRITER='lists.history.SyncWriter'):
+            yield
+    finally:
+        history.discard(connection.alias)
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def seed(lists: int, items: int, batch_size: int = 5000) -> list:
+    List.objects.bulk_create([List(name=f'Benchmark List {i}')
+                              for i in range(lists)], batch_size=batch_size)
+    list_ids = list(List.objects.values_list('id', flat=True))
+    states = Item.ItemState.values
+    prios = Item.ItemPrio.values
+    Item.objects.bulk_create([Item(text=f'Benchmark item {i}',
+                                   list_id=list_ids[i % len(list_ids)],
+                                   state=states[i % len(states)],
+                                   prio=prios[i % len(prios)])
+                              for i in range(items)], batch_size=batch_size)
+    return list_ids
+
+
+def _request(request) -> tuple:
+    # A request is a path to GET or a (method, path, form data) tuple. Form
+    # data is sent urlencoded, which both test clients accept.
+    if isinstance(request, str):
+        return 'get', request, {}
+    method, path, data = request
+    if method == 'get':
+        return method, path, {'data': data}
+    return method, path, {'data': urlencode(data, doseq=True),
+                          'content_type': 'application/x-www-form-urlencoded'}
+
+
+def run_wsgi(requests: list, concurrency: int = 1):
+    # Drives the WSGI handler from a pool of threads, one client per thread.
+    # Returns the wall time and the per-request timings.
+    local = threading.local()
+
+    def send(request):
+        if not hasattr(local, 'client'):
+            local.client = Client()
+        method, path, kwargs = _request(request)
+        start = time.perf_counter()
+        getattr(local.client, method)(path, **kwargs)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        timings = list(pool.map(send, requests))
+    return time.perf_counter() - start, timings
+
+
+def run_asgi(requests: list, concurrency: int = 1):
+    # Drives the ASGI handler with up to `concurrency` requests in flight.
+    async def main():
+        client = AsyncClient()
+        slots = asyncio.Semaphore(concurrency)
+
+        async def send(request):
+            method, path, kwargs = _request(request)
+            async with slots:
+                start = time.perf_counter()
+                await getattr(client, method)(path, **kwargs)
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        timings = await asyncio.gather(*(send(request)
+                                         for request in requests))
+        return time.perf_counter() - start, timings
+
+    return asyncio.run(main())
+
+
+def summarize(elapsed: float, timings: list) -> dict:
+    ordered = sorted(timings)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000
+
+    return {'requests': len(timings),
+            'throughput': round(len(timings) / elapsed, 2),
+            'mean_ms': round(sum(timings) / len(timings) * 1000, 3),
+            'p50_ms': round(percentile(0.50), 3),
+            'p99_ms': round(percentile(0.99), 3)}
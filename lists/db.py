@@ -0,0 +1,15 @@
+"""Per-connection database tuning.
+
+Connected to django.db.backends.signals.connection_created in
+ListsConfig.ready(); applies the LISTS_SQLITE_PRAGMAS profile to every new
+SQLite connection and leaves other backends alone.
+"""
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.LISTS_SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
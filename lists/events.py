@@ -0,0 +1,105 @@
+"""Publish/subscribe of list changes, streamed to browsers as Server-Sent
+Events.
+
+Write views publish small JSON deltas for a list; every open event stream of
+that list receives them. The hub is pluggable through the LISTS_EVENT_HUB
+setting. The default LocalHub only reaches subscribers in the same process,
+a shared backend (e.g. Redis pub/sub) can implement the same two methods.
+
+A stream blocks its thread while it waits for events, so it is served by
+WSGI worker threads only; superlists.async_urls does not route it.
+"""
+import json
+import queue
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class EventHub:
+    def publish(self, list_id: int, event: dict) -> None:
+        raise NotImplementedError
+
+    def subscribe(self, list_id: int) -> 'Subscription':
+        raise NotImplementedError
+
+
+class Subscription:
+    def __init__(self, hub: 'LocalHub', list_id: int):
+        self.hub = hub
+        self.list_id = list_id
+        self.queue = queue.SimpleQueue()
+
+    def get(self, timeout: float = None):
+        # The next event, or None if nothing arrived within the timeout.
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class LocalHub(EventHub):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def publish(self, list_id: int, event: dict) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(list_id, ()))
+        for subscription in subscriptions:
+            subscription.queue.put(event)
+
+    def subscribe(self, list_id: int) -> Subscription:
+        subscription = Subscription(self, list_id)
+        with self._lock:
+            self._subscriptions[list_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.list_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.list_id]
+
+
+@lru_cache(maxsize=None)
+def _load_hub(path: str) -> EventHub:
+    return import_string(path)()
+
+
+def get_hub() -> EventHub:
+    return _load_hub(settings.LISTS_EVENT_HUB)
+
+
+def publish(list_id: int, type: str, **data) -> None:
+    get_hub().publish(list_id, {'type': type, 'list': list_id, **data})
+
+
+def item_data(item) -> dict:
+    return {'id': item.id, 'text': item.text,
+            'state': item.state, 'state_text': item.state_text,
+            'prio': item.prio, 'prio_text': item.prio_text}
+
+
+def stream(subscription, heartbeat: float = None):
+    # Yields SSE frames until the client goes away and the response is
+    # closed. Comment frames keep idle connections and proxies alive.
+    heartbeat = heartbeat or settings.LISTS_EVENT_HEARTBEAT
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            event = subscription.get(timeout=heartbeat)
+            if event is None:
+                yield ': keepalive\n\n'
+            else:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        subscription.close()
@@ -0,0 +1,161 @@
+"""Append-only log of item state transitions.
+
+Item creation and every state change made through ItemQuerySet record an
+ItemTransition once the change is committed. Rows go through the writer
+named by LISTS_HISTORY_WRITER. The default BufferedWriter collects them in
+memory and inserts them in one batch once LISTS_HISTORY_FLUSH_SIZE rows are
+waiting or LISTS_HISTORY_FLUSH_INTERVAL seconds have passed, so the click
+path itself does no extra insert. SyncWriter inserts every row right away.
+
+Creations record from_state None. Deletes and bulk state changes read the
+states they replace before they write. Rows changed by someone else in
+between record UNKNOWN, which is stored as from_state NULL with `created`
+False. The log is never filled in from earlier log rows, which may be
+missing or not written yet.
+
+Buffered rows belong to the database they were recorded for. They are only
+written while the connection alias still points at that database, so rows
+of a test database that is gone are dropped instead of landing in the one
+configured afterwards. The test runner and the benchmarks use SyncWriter.
+"""
+import atexit
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+# The previous state of a transition is not known when it is recorded.
+UNKNOWN = object()
+
+
+class HistoryWriter:
+    def record(self, row: dict) -> None:
+        raise NotImplementedError
+
+    def flush(self) -> int:
+        return 0
+
+    def discard(self, using: str) -> None:
+        pass
+
+
+class SyncWriter(HistoryWriter):
+    def record(self, row: dict) -> None:
+        write([row], row['using'])
+
+
+class BufferedWriter(HistoryWriter):
+    def __init__(self):
+        self.size = settings.LISTS_HISTORY_FLUSH_SIZE
+        self.interval = settings.LISTS_HISTORY_FLUSH_INTERVAL
+        self._lock = threading.Lock()
+        self._rows = defaultdict(list)
+        self._count = 0
+        self._timer = None
+        atexit.register(self.flush)
+
+    def record(self, row: dict) -> None:
+        with self._lock:
+            self._rows[_database(row['using'])].append(row)
+            self._count += 1
+            full = self._count >= self.size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.interval, self._flush_later)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        with self._lock:
+            buffered, self._rows = self._rows, defaultdict(list)
+            self._count = 0
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        flushed = 0
+        for (using, name), rows in buffered.items():
+            if _database(using) == (using, name):
+                write(rows, using)
+                flushed += len(rows)
+        return flushed
+
+    def discard(self, using: str) -> None:
+        with self._lock:
+            for key in [key for key in self._rows if key[0] == using]:
+                self._count -= len(self._rows.pop(key))
+
+    def _flush_later(self):
+        try:
+            self.flush()
+        finally:
+            connections.close_all()
+
+
+_writers = {}
+
+
+def get_writer() -> HistoryWriter:
+    path = settings.LISTS_HISTORY_WRITER
+    if path not in _writers:
+        _writers[path] = import_string(path)()
+    return _writers[path]
+
+
+def discard(using: str = DEFAULT_DB_ALIAS) -> None:
+    # Drops what is buffered for `using`, e.g. before its test database is
+    # destroyed.
+    for writer in list(_writers.values()):
+        writer.discard(using)
+
+
+def _database(using: str) -> tuple:
+    return using, connections[using].settings_dict['NAME']
+
+
+def record(rows: list, using: str) -> None:
+    # Rows reach the writer once the transaction commits, so a rolled back
+    # change is never logged.
+    if rows:
+        transaction.on_commit(lambda: _record_all(rows), using=using)
+
+
+def record_created(items: list, using: str) -> None:
+    record([transition(item.id, item.list_id, None, item.state, using)
+            for item in items if item.id is not None], using)
+
+
+def _record_all(rows: list) -> None:
+    writer = get_writer()
+    for row in rows:
+        writer.record(row)
+
+
+def transition(item_id: int, list_id: int, from_state, to_state: int,
+               using: str = DEFAULT_DB_ALIAS) -> dict:
+    # from_state is None for a creation and UNKNOWN if it is not known.
+    return {'item_id': item_id, 'list_id': list_id, 'from_state': from_state,
+            'to_state': to_state, 'created_at': timezone.now(),
+            'using': using}
+
+
+def write(rows: list, using: str = DEFAULT_DB_ALIAS) -> int:
+    from lists.models import ItemTransition
+
+    transitions = []
+    for row in rows:
+        from_state = row['from_state']
+        if from_state is UNKNOWN:
+            from_state = None
+        elif from_state == row['to_state']:
+            continue
+        transitions.append(ItemTransition(
+            item_id=row['item_id'], list_id=row['list_id'],
+            from_state=from_state, to_state=row['to_state'],
+            created=row['from_state'] is None,
+            created_at=row['created_at']))
+    ItemTransition.objects.using(using).bulk_create(transitions)
+    return len(transitions)
@@ -0,0 +1,112 @@
+"""Per-request query count, DB time, template time and latency.
+
+InstrumentationMiddleware reports them as a Server-Timing header and as one
+JSON log line on the 'lists.instrumentation' logger. Views declare an upper
+bound on their queries with @query_budget; the middleware logs a warning when
+a request exceeds it and lists.testing.QueryBudgetMixin asserts it in tests.
+
+Enable by adding 'lists.instrumentation.InstrumentationMiddleware' to
+MIDDLEWARE. The middleware is sync only, so under ASGI it costs a thread hop
+per request. Queries made while a streaming response is consumed fall
+outside the measurement.
+"""
+import json
+import logging
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger('lists.instrumentation')
+_current = ContextVar('lists_request_timings', default=None)
+
+
+def query_budget(queries: int):
+    def decorator(view):
+        view.query_budget = queries
+        return view
+    return decorator
+
+
+class RequestTimings:
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        self.rendering = False
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += time.perf_counter() - start
+
+
+def _instrument_templates():
+    # Times only outermost renders, includes and extends are part of them.
+    if getattr(Template.render, 'instrumented', False):
+        return
+    render = Template.render
+
+    def timed_render(self, context):
+        timings = _current.get()
+        if timings is None or timings.rendering:
+            return render(self, context)
+        timings.rendering = True
+        start = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            timings.rendering = False
+            timings.template += time.perf_counter() - start
+
+    timed_render.instrumented = True
+    Template.render = timed_render
+
+
+class InstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        _instrument_templates()
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timings.record_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - start
+        response['Server-Timing'] = (
+            f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries", '
+            f'tpl;dur={timings.template * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}')
+        budget = getattr(request, 'query_budget', None)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': getattr(request, 'view_name', None),
+            'status': response.status_code,
+            'queries': timings.queries,
+            'query_budget': budget,
+            'db_ms': round(timings.db * 1000, 3),
+            'template_ms': round(timings.template * 1000, 3),
+            'total_ms': round(total * 1000, 3),
+        }))
+        if budget is not None and timings.queries > budget:
+            logger.warning('%s used %d queries, over its budget of %d',
+                           request.path, timings.queries, budget)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.view_name = f'{view_func.__module__}.{view_func.__name__}'
+        request.query_budget = getattr(view_func, 'query_budget', None)
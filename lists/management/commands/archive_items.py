@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from lists.archive import archive_deleted, restore_archived
+
+
+class Command(BaseCommand):
+    help = ('Move items deleted longer than the retention window into the '
+            'archive table, or restore archived items with --restore.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            default=settings.LISTS_ARCHIVE_AFTER_DAYS,
+                            help='Retention window for deleted items.')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Items moved per transaction.')
+        parser.add_argument('--pause', type=float, default=0,
+                            help='Seconds to sleep between batches.')
+        parser.add_argument('--restore', action='store_true')
+        parser.add_argument('--list', type=int,
+                            help='Only restore items of this list.')
+
+    def handle(self, *args, **options):
+        if options['restore']:
+            restored = restore_archived(options['list'],
+                                        options['batch_size'],
+                                        options['pause'])
+            self.stderr.write(f'Restored {restored} items.')
+            return
+        archived = archive_deleted(options['days'], options['batch_size'],
+                                   options['pause'])
+        self.stderr.write(f'Archived {archived} items.')
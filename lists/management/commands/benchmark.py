@@ -0,0 +1,96 @@
+import json
+import random
+import sys
+import tempfile
+from contextlib import ExitStack
+from pathlib import Path
+
+import django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+
+from lists.benchmarks import (benchmark_database, run_asgi, run_wsgi, seed,
+                              summarize)
+from lists.models import Item
+
+DRIVERS = {
+    'wsgi': (run_wsgi, 'superlists.urls'),
+    'asgi': (run_asgi, 'superlists.urls'),
+    'asgi-async': (run_asgi, 'superlists.async_urls'),
+}
+SCENARIOS = ['home_page', 'view_list', 'add_item', 'state_up', 'state_down']
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway database, drive the hot list views in process '
+            'and print throughput and latency percentiles as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lists', type=int, default=100)
+        parser.add_argument('--items', type=int, default=10000)
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests per scenario.')
+        parser.add_argument('--concurrency', type=int, default=1)
+        parser.add_argument('--driver', choices=DRIVERS, default='wsgi')
+        parser.add_argument('--scenario', action='append',
+                            choices=SCENARIOS,
+                            help='Repeatable, defaults to all scenarios.')
+        parser.add_argument('--no-cache', action='store_true',
+                            help='Use the dummy cache backend.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write JSON here, not stdout.')
+
+    def handle(self, *args, **options):
+        run, urlconf = DRIVERS[options['driver']]
+        overrides = {'ROOT_URLCONF': urlconf}
+        if options['no_cache']:
+            overrides['CACHES'] = {'default': {
+                'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        rng = random.Random(options['seed'])
+        results = {}
+        with ExitStack() as stack:
+            name = None
+            if options['concurrency'] > 1 and connection.vendor == 'sqlite':
+                # Shared-cache in-memory SQLite takes table locks that ignore
+                # busy_timeout, concurrent writes need a database file.
+                directory = stack.enter_context(tempfile.TemporaryDirectory())
+                name = str(Path(directory) / 'bench.sqlite3')
+            stack.enter_context(benchmark_database(name))
+            stack.enter_context(override_settings(**overrides))
+            list_ids = seed(options['lists'], options['items'])
+            for scenario in options['scenario'] or SCENARIOS:
+                cache.clear()
+                requests = self.requests(scenario, list_ids, rng,
+                                         options['requests'])
+                results[scenario] = summarize(
+                    *run(requests, options['concurrency']))
+        report = {
+            'config': {key: options[key] for key in (
+                'lists', 'items', 'requests', 'concurrency', 'driver',
+                'no_cache', 'seed')},
+            'environment': {'django': django.get_version(),
+                            'python': sys.version.split()[0],
+                            'database': connection.vendor},
+            'results': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as stream:
+                stream.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def requests(self, scenario: str, list_ids: list, rng, count: int):
+        if scenario == 'home_page':
+            return ['/'] * count
+        if scenario == 'view_list':
+            return [f'/lists/{rng.choice(list_ids)}/' for _ in range(count)]
+        if scenario == 'add_item':
+            return [('post', f'/lists/{rng.choice(list_ids)}/add_item',
+                     {'item_text': f'Benchmark item {i}', 'prio_id': 2})
+                    for i in range(count)]
+        items = list(Item.objects.values_list('id', 'list_id'))
+        return [('post', f'/lists/{list_id}/{item_id}/{scenario}', {})
+                for item_id, list_id in rng.choices(items, k=count)]
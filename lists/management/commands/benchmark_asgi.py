@@ -0,0 +1,39 @@
+import random
+from statistics import mean
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from lists.benchmarks import benchmark_database, run_asgi, run_wsgi, seed
+
+SERVERS = [
+    ('wsgi, sync views', run_wsgi, 'superlists.urls'),
+    ('asgi, sync views', run_asgi, 'superlists.urls'),
+    ('asgi, async views', run_asgi, 'superlists.async_urls'),
+]
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway database and compare request throughput of the '
+            'list views under WSGI and ASGI.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lists', type=int, default=100)
+        parser.add_argument('--items', type=int, default=10000)
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=16)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            list_ids = seed(options['lists'], options['items'])
+            rng = random.Random(0)
+            paths = [rng.choice(['/', f'/lists/{rng.choice(list_ids)}/'])
+                     for _ in range(options['requests'])]
+            for label, run, urlconf in SERVERS:
+                cache.clear()
+                with override_settings(ROOT_URLCONF=urlconf):
+                    elapsed, timings = run(paths, options['concurrency'])
+                self.stdout.write(f'{label:<18} '
+                                  f'{len(timings) / elapsed:8.1f} req/s  '
+                                  f'mean: {mean(timings) * 1000:.2f} ms')
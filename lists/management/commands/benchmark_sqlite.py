@@ -0,0 +1,98 @@
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.test import override_settings
+
+from lists.benchmarks import benchmark_database, seed
+from lists.models import Item, List
+
+
+class Command(BaseCommand):
+    help = ('Run concurrent readers and state-changing writers against a '
+            'file-backed SQLite database, without and with the '
+            'LISTS_SQLITE_PRAGMAS profile.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lists', type=int, default=100)
+        parser.add_argument('--items', type=int, default=10000)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('This benchmark needs an SQLite database.')
+        profile = settings.LISTS_SQLITE_PRAGMAS
+        # The profile is applied to every new connection, including the one
+        # that creates the database, so it stays off until the second run.
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(LISTS_SQLITE_PRAGMAS={}), \
+                benchmark_database(str(Path(directory) / 'bench.sqlite3')):
+            seed(options['lists'], options['items'])
+            with connection.cursor() as cursor:
+                # WAL mode sticks to the file once set.
+                cursor.execute('PRAGMA journal_mode = DELETE')
+            connection.close()
+            self.report('defaults', self.run(options))
+            with override_settings(LISTS_SQLITE_PRAGMAS=profile):
+                connection.close()
+                self.report('profile', self.run(options))
+            connection.close()
+
+    def run(self, options):
+        list_ids = list(List.objects.values_list('id', flat=True))
+        item_ids = list(Item.objects.values_list('id', 'list_id'))
+        deadline = time.perf_counter() + options['seconds']
+        counts = {'reads': 0, 'writes': 0, 'locked': 0}
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            counts['journal_mode'] = cursor.fetchone()[0]
+        lock = threading.Lock()
+
+        def reader(rng):
+            while time.perf_counter() < deadline:
+                List.objects.get(id=rng.choice(list_ids)).items_by_state()
+                with lock:
+                    counts['reads'] += 1
+
+        def writer(rng):
+            while time.perf_counter() < deadline:
+                item_id, list_id = rng.choice(item_ids)
+                try:
+                    Item.objects.state_up(item_id, list_id)
+                    Item.objects.state_down(item_id, list_id)
+                    key = 'writes'
+                except OperationalError:
+                    key = 'locked'
+                with lock:
+                    counts[key] += 1
+
+        def worker(target, seed):
+            try:
+                target(random.Random(seed))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(reader, i))
+                   for i in range(options['readers'])]
+        threads += [threading.Thread(target=worker, args=(writer, -i - 1))
+                    for i in range(options['writers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counts['seconds'] = options['seconds']
+        return counts
+
+    def report(self, label: str, counts: dict):
+        seconds = counts['seconds']
+        self.stdout.write(f"{label:<9} reads/s: {counts['reads'] / seconds:8.1f}"
+                          f"  writes/s: {counts['writes'] / seconds:8.1f}"
+                          f"  locked errors: {counts['locked']}"
+                          f"  journal_mode: {counts['journal_mode']}")
@@ -0,0 +1,61 @@
+import copy
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from lists.benchmarks import summarize
+from lists.models import Item, List
+from lists.views import _render_items_table, _render_list
+
+APP_LOADER = 'django.template.loaders.app_directories.Loader'
+LOADERS = {
+    'uncached': [APP_LOADER],
+    'cached': [('django.template.loaders.cached.Loader', [APP_LOADER])],
+}
+
+
+class Command(BaseCommand):
+    help = ('Render list.html in process with and without the cached '
+            'template loader and print render latencies as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=1000,
+                            help='Items per visible state.')
+        parser.add_argument('--renders', type=int, default=50)
+
+    def handle(self, *args, **options):
+        # Unsaved rows are enough to render, so no database is needed.
+        list_ = List(id=1, name='Benchmark List', version=0)
+        items_by_state = List._state_buckets()
+        for state, items in items_by_state.items():
+            for i in range(options['items']):
+                item = Item(id=len(items_by_state) * i + state, list=list_,
+                            text=f'Benchmark item {i}', state=state,
+                            prio=Item.ItemPrio.values[i % len(Item.ItemPrio)])
+                item.set_labels()
+                items.append(item)
+        request = RequestFactory().get(f'/lists/{list_.id}/')
+        results = {}
+        for mode, loaders in LOADERS.items():
+            with override_settings(TEMPLATES=self.templates(loaders)):
+                self.render(request, list_, items_by_state)
+                timings = [self.render(request, list_, items_by_state)
+                           for _ in range(options['renders'])]
+            results[mode] = summarize(sum(timings), timings)
+        self.stdout.write(json.dumps({
+            'config': {key: options[key] for key in ('items', 'renders')},
+            'results': results}, indent=2))
+
+    def templates(self, loaders: list) -> list:
+        templates = copy.deepcopy(settings.TEMPLATES)
+        templates[0]['APP_DIRS'] = False
+        templates[0]['OPTIONS']['loaders'] = loaders
+        return templates
+
+    def render(self, request, list_: List, items_by_state: dict) -> float:
+        start = time.perf_counter()
+        _render_list(request, list_, _render_items_table(list_, items_by_state))
+        return time.perf_counter() - start
@@ -0,0 +1,45 @@
+import random
+from statistics import mean, median
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from lists.benchmarks import benchmark_database, run_wsgi, seed
+from lists.models import Item, List
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway database and compare view_list query plans and '
+            'timings without and with the partial (list, state, prio) item '
+            'index.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lists', type=int, default=1000)
+        parser.add_argument('--items', type=int, default=100000)
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        index = next(index for index in Item._meta.indexes
+                     if index.name == 'item_visible_idx')
+        with benchmark_database():
+            list_ids = seed(options['lists'], options['items'])
+            sample = random.Random(0).choices(list_ids,
+                                              k=options['requests'])
+            with connection.schema_editor() as editor:
+                editor.remove_index(Item, index)
+            self.report('before', sample)
+            with connection.schema_editor() as editor:
+                editor.add_index(Item, index)
+            self.report('after', sample)
+
+    def report(self, label: str, list_ids: list):
+        cache.clear()
+        list_ = List.objects.get(id=list_ids[0])
+        plan = list_.item_set.exclude(state=Item.ItemState.DELETED).explain()
+        _, timings = run_wsgi([f'/lists/{list_id}/' for list_id in list_ids])
+        self.stdout.write(f'== {label}')
+        self.stdout.write(plan)
+        self.stdout.write(f'requests: {len(timings)}  '
+                          f'mean: {mean(timings) * 1000:.2f} ms  '
+                          f'median: {median(timings) * 1000:.2f} ms')
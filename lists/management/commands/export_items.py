@@ -0,0 +1,33 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from lists.models import Item
+from lists.transfer import (EXPORT_CHUNK_SIZE, FORMATS, export_rows,
+                            format_rows)
+
+
+class Command(BaseCommand):
+    help = 'Export items as JSON Lines or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='-',
+                            help="File to write, '-' for stdout.")
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument('--list', dest='list_name',
+                            help='Only export the list with this name.')
+        parser.add_argument('--chunk-size', type=int,
+                            default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        items = Item.objects.all()
+        if options['list_name']:
+            items = items.filter(list__name=options['list_name'])
+        lines = format_rows(export_rows(items, options['chunk_size']),
+                            options['format'])
+        if options['output'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+        else:
+            with Path(options['output']).open('w', newline='') as stream:
+                stream.writelines(lines)
@@ -0,0 +1,30 @@
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from lists.transfer import FORMATS, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = ('Import items from a JSON Lines or CSV file, creating lists by '
+            'name as needed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to read, '-' for stdin.")
+        parser.add_argument('--format', choices=FORMATS,
+                            help='Defaults to the file extension, else jsonl.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = options['format'] or ('csv' if path.endswith('.csv')
+                                       else 'jsonl')
+        if path == '-':
+            imported = import_rows(read_rows(sys.stdin, format),
+                                   options['batch_size'])
+        else:
+            with Path(path).open(newline='') as stream:
+                imported = import_rows(read_rows(stream, format),
+                                       options['batch_size'])
+        self.stderr.write(f'Imported {imported} items.')
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from lists import search
+
+
+class Command(BaseCommand):
+    help = ('Drop and rebuild the item full-text index and its sync '
+            'triggers from the item table.')
+
+    def handle(self, *args, **options):
+        if not search.uses_fts(connection):
+            raise CommandError(f'{connection.vendor} has no full-text index, '
+                               f'search uses a LIKE scan.')
+        with transaction.atomic():
+            search.rebuild(connection)
+        self.stderr.write('Rebuilt the item search index.')
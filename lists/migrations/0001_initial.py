@@ -0,0 +1,34 @@
+# Generated by Django 4.1.13 on 2026-10-17 21:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='List',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Item',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(default='')),
+                ('state', models.IntegerField(choices=[(1, 'Open'), (2, 'In Progress'), (3, 'Done'), (0, 'Deleted')], default=1)),
+                ('state_text', models.CharField(default='', max_length=12)),
+                ('prio', models.IntegerField(choices=[(0, 'Very Low'), (1, 'Low'), (2, 'High'), (3, 'Very High'), (4, 'Urgent')], default=1)),
+                ('prio_text', models.CharField(default='', max_length=12)),
+                ('list', models.ForeignKey(default='', on_delete=django.db.models.deletion.CASCADE, to='lists.list')),
+            ],
+        ),
+    ]
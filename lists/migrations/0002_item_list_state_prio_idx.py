@@ -0,0 +1,21 @@
+# Generated by Django 4.1.13 on 2026-10-17 21:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='item',
+            options={'ordering': ['list', 'state', 'prio', 'id']},
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['list', 'state', 'prio'], name='item_list_state_prio_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.1.13 on 2026-10-17 21:59
+
+from django.db import migrations, models
+import time
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0002_item_list_state_prio_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='version',
+            field=models.BigIntegerField(default=time.time_ns),
+        ),
+    ]
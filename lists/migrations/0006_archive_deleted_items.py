@@ -0,0 +1,41 @@
+# Generated by Django 4.1.13 on 2026-10-17 22:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0005_item_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedItem',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('text', models.TextField(default='')),
+                ('state', models.IntegerField(choices=[(1, 'Open'), (2, 'In Progress'), (3, 'Done'), (0, 'Deleted')])),
+                ('prio', models.IntegerField(choices=[(0, 'Very Low'), (1, 'Low'), (2, 'High'), (3, 'Very High'), (4, 'Urgent')])),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='item',
+            name='item_list_state_prio_idx',
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('state', 0), _negated=True), fields=['list', 'state', 'prio'], name='item_visible_idx'),
+        ),
+        migrations.AddField(
+            model_name='archiveditem',
+            name='list',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='lists.list'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.1.13 on 2026-10-17 22:14
+
+from django.db import migrations, models
+
+from lists import search
+
+
+def reinstall_search_triggers(apps, schema_editor):
+    # SQLite rebuilds the item table to add the column, which drops the
+    # full-text triggers.
+    search.install(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0006_archive_deleted_items'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='item',
+            options={'ordering': ['list', 'state', 'position', 'prio', 'id']},
+        ),
+        migrations.RemoveIndex(
+            model_name='item',
+            name='item_visible_idx',
+        ),
+        migrations.AddField(
+            model_name='archiveditem',
+            name='position',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='position',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('state', 0), _negated=True), fields=['list', 'state', 'position', 'prio'], name='item_visible_idx'),
+        ),
+        migrations.RunPython(reinstall_search_triggers,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.1.13 on 2026-10-17 22:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0007_item_position'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_state', models.IntegerField(choices=[(1, 'Open'), (2, 'In Progress'), (3, 'Done'), (0, 'Deleted')], null=True)),
+                ('to_state', models.IntegerField(choices=[(1, 'Open'), (2, 'In Progress'), (3, 'Done'), (0, 'Deleted')])),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('item', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='lists.item')),
+                ('list', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='lists.list')),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='itemtransition',
+            index=models.Index(fields=['item', 'created_at'], name='transition_item_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='itemtransition',
+            index=models.Index(fields=['list', 'created_at'], name='transition_list_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.1.13 on 2026-10-17 22:31
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def mark_creations(apps, schema_editor):
+    # The first logged row of an item with no from_state is its creation.
+    ItemTransition = apps.get_model('lists', 'ItemTransition')
+    earlier = ItemTransition.objects.filter(item_id=OuterRef('item_id'),
+                                            id__lt=OuterRef('id'))
+    ItemTransition.objects.filter(from_state__isnull=True).exclude(
+        Exists(earlier)).update(created=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0008_item_transition'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itemtransition',
+            name='created',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_creations, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,386 @@
-from django.db import models
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, models, transaction
+from django.db.models import (Case, Count, Exists, F, IntegerField,
+                              OuterRef, Q, Subquery, Value, When)
+from django.db.models.functions import Coalesce
+from django.db.models.sql import UpdateQuery
+from django.utils import timezone
+
+from lists import history, ranks, search
 
 # Create your models here.
+class ListQuerySet(models.QuerySet):
+    def bump_version(self) -> int:
+        # Invalidates the cached item tables of these lists.
+        return self.update(**self._bump())
+
+    async def abump_version(self) -> int:
+        return await self.aupdate(**self._bump())
+
+    @staticmethod
+    def _bump() -> dict:
+        return {'version': F('version') + 1, 'updated_at': timezone.now()}
+
+    def with_item_counts(self):
+        # Per-state item counts in the same query. They are correlated
+        # subqueries rather than a GROUP BY, so a sliced page only counts the
+        # items of the lists it returns.
+        states = Item.ItemState
+        return self.annotate(**{
+            f'{state.name.lower()}_count': Coalesce(Subquery(
+                Item.objects.filter(list=OuterRef('pk'), state=state)
+                            .order_by().values('list')
+                            .annotate(count=Count('id')).values('count'),
+                output_field=IntegerField()), 0)
+            for state in (states.OPEN, states.IN_PROGRESS, states.DONE)})
+
+    def page(self, size: int, after=None, prefix: str = None):
+        key, lists = self._page(size, after, prefix)
+        return self._split_page(list(lists), size, key)
+
+    async def apage(self, size: int, after=None, prefix: str = None):
+        key, lists = self._page(size, after, prefix)
+        return self._split_page([list_ async for list_ in lists], size, key)
+
+    def _page(self, size: int, after, prefix: str):
+        # Keyset pagination: seek past the cursor instead of using OFFSET, so
+        # deep pages cost the same as the first. Prefix searches walk the
+        # unique name index, everything else the primary key.
+        key = 'name' if prefix else 'id'
+        lists = self
+        if prefix:
+            lists = lists.filter(name__gte=prefix,
+                                 name__lt=prefix + '\U0010ffff')
+        if after is not None:
+            lists = lists.filter(**{f'{key}__gt': after})
+        return key, lists.order_by(key)[:size + 1]
+
+    @staticmethod
+    def _split_page(lists: list, size: int, key: str):
+        next_cursor = getattr(lists[size - 1], key) if len(lists) > size else None
+        return lists[:size], next_cursor
+
 class List(models.Model):
     name = models.CharField(max_length = 200, unique=True)
+    # Starts at the creation time so a reused id never matches a fragment
+    # cached for an earlier list.
+    version = models.BigIntegerField(default=time.time_ns)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = ListQuerySet.as_manager()
+
+    def items_by_state(self):
+        # One query for all visible items, bucketed by state in Python.
+        buckets = self._state_buckets()
+        for item in self.item_set.exclude(state=Item.ItemState.DELETED):
+            buckets[item.state].append(item)
+        return buckets
+
+    async def aitems_by_state(self):
+        buckets = self._state_buckets()
+        async for item in self.item_set.exclude(state=Item.ItemState.DELETED):
+            buckets[item.state].append(item)
+        return buckets
+
+    @staticmethod
+    def _state_buckets() -> dict:
+        return {state: [] for state in Item.ItemState.values
+                if state != Item.ItemState.DELETED}
+
+class ItemQuerySet(models.QuerySet):
+    # bulk_create, bulk_update and update() bypass Item.save, so they fill in
+    # the denormalized state_text/prio_text themselves. Like Item.save, every
+    # write bumps the version of the lists it touched once it is done.
+    def bulk_create(self, objs, *args, record_history=True, **kwargs):
+        # record_history=False for rows that are not new items, e.g. restored
+        # from the archive.
+        objs = list(objs)
+        for obj in objs:
+            obj.set_labels()
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if record_history:
+            history.record_created(objs, self.db)
+        self._bump_lists({obj.list_id for obj in objs})
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        now = timezone.now()
+        for obj in objs:
+            obj.set_labels()
+            obj.updated_at = now
+        fields = list(fields)
+        fields += [f'{field}_text' for field in ('state', 'prio')
+                   if field in fields and f'{field}_text' not in fields]
+        fields += ['updated_at'] if 'updated_at' not in fields else []
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        self._bump_lists({obj.list_id for obj in objs})
+        return rows
+
+    def update(self, **kwargs):
+        return self._update(self._list_ids(), **kwargs)
+
+    def delete(self):
+        list_ids = self._list_ids()
+        deleted = super().delete()
+        self._bump_lists(list_ids)
+        return deleted
+
+    def _update(self, list_ids, **kwargs) -> int:
+        # update() for callers that already know the lists of the items.
+        rows = super().update(**self._with_labels(kwargs))
+        if rows:
+            self._bump_lists(list_ids)
+        return rows
+
+    def _list_ids(self) -> list:
+        # Read before a write that may change which rows the filter matches.
+        return list(self.order_by().values_list('list_id', flat=True)
+                        .distinct())
+
+    def _bump_lists(self, list_ids) -> None:
+        if list_ids:
+            List.objects.using(self.db).filter(
+                id__in=list_ids).bump_version()
+
+    def _with_labels(self, kwargs: dict) -> dict:
+        # Literal values get their label in the same UPDATE. Expressions are
+        # left to the caller, see _transition and relabel.
+        for field, labels in (('state', self.model.STATE_LABELS),
+                              ('prio', self.model.PRIO_LABELS)):
+            value = kwargs.get(field)
+            if value is not None and not hasattr(value, 'resolve_expression'):
+                kwargs.setdefault(f'{field}_text', labels[value])
+        kwargs.setdefault('updated_at', timezone.now())
+        return kwargs
+
+    def _update_returning(self, **kwargs) -> list:
+        # update() that also returns (id, list_id, state) of every changed
+        # row, in the same statement where the backend has UPDATE ...
+        # RETURNING (SQLite 3.35+, PostgreSQL). Elsewhere the rows are locked
+        # and read first.
+        connection = connections[self.db]
+        kwargs = self._with_labels(kwargs)
+        if not connection.features.can_return_columns_from_insert:
+            with transaction.atomic(using=self.db):
+                ids = list(self.select_for_update()
+                               .values_list('id', flat=True))
+                items = self.model._base_manager.filter(id__in=ids)
+                items.update(**kwargs)
+                return list(items.values_list('id', 'list_id', 'state'))
+        query = self.query.chain(UpdateQuery)
+        query.add_update_values(kwargs)
+        query.annotations = {}
+        try:
+            sql, params = query.get_compiler(self.db).as_sql()
+        except EmptyResultSet:
+            return []
+        columns = ', '.join(connection.ops.quote_name(column)
+                            for column in ('id', 'list_id', 'state'))
+        with transaction.mark_for_rollback_on_error(using=self.db):
+            with connection.cursor() as cursor:
+                cursor.execute(f'{sql} RETURNING {columns}', params)
+                return cursor.fetchall()
+
+    def relabel(self) -> int:
+        # Recomputes both labels from the stored values in one UPDATE.
+        list_ids = self._list_ids()
+        rows = super().update(
+            state_text=self._label_case('state', self.model.STATE_LABELS),
+            prio_text=self._label_case('prio', self.model.PRIO_LABELS))
+        self._bump_lists(list_ids)
+        return rows
+
+    # State transitions are single conditional UPDATEs, so concurrent clicks
+    # cannot lose an update and no row is read first. Deletes read the state
+    # first so the log gets the one they replace. They return the number of
+    # rows changed, which is 0 when the transition is not allowed, and log
+    # every change to lists.history.
+    def state_up(self, item_id: int, list_id: int) -> int:
+        return self._apply(*self._transition('state_up', item_id, list_id))
+
+    def state_down(self, item_id: int, list_id: int) -> int:
+        return self._apply(*self._transition('state_down', item_id, list_id))
+
+    def delete_item(self, item_id: int, list_id: int) -> int:
+        return self._apply(*self._transition('delete_item', item_id, list_id))
+
+    async def astate_up(self, item_id: int, list_id: int) -> int:
+        return await sync_to_async(self._apply)(
+            *self._transition('state_up', item_id, list_id))
+
+    async def astate_down(self, item_id: int, list_id: int) -> int:
+        return await sync_to_async(self._apply)(
+            *self._transition('state_down', item_id, list_id))
+
+    async def adelete_item(self, item_id: int, list_id: int) -> int:
+        return await sync_to_async(self._apply)(
+            *self._transition('delete_item', item_id, list_id))
+
+    def bulk_change(self, list_id: int, item_ids: list, state: int = None,
+                    prio: int = None) -> int:
+        # One UPDATE for all selected items, labels included. A state change
+        # reads the current states first, for the history log.
+        changes = {}
+        if state is not None:
+            changes['state'] = self.model.ItemState(state)
+        if prio is not None:
+            changes['prio'] = self.model.ItemPrio(prio)
+        if not changes or not item_ids:
+            return 0
+        items = self.filter(list_id=list_id, id__in=item_ids)
+        if state is None:
+            return items._update([list_id], **changes)
+        return self._apply(items, changes)
+
+    def move(self, item_id: int, list_id: int, after_id: int = None) -> str:
+        # Puts the item right after `after_id`, or first in its state column,
+        # by giving it a rank key between its new neighbours. Once the column
+        # is ranked that is two reads and a single-row UPDATE. Returns the
+        # new key; raises ValueError if `after_id` is not in the same column.
+        rows = dict((id_, (state, position)) for id_, state, position in
+                    self.filter(list_id=list_id, id__in=[item_id, after_id])
+                        .values_list('id', 'state', 'position'))
+        if item_id not in rows:
+            raise self.model.DoesNotExist(f'No item {item_id} in list '
+                                          f'{list_id}')
+        state = rows[item_id][0]
+        lower = ''
+        if after_id is not None:
+            if after_id == item_id or rows.get(after_id, (None,))[0] != state:
+                raise ValueError(f'Item {after_id} is not in the column of '
+                                 f'item {item_id}')
+            lower = rows[after_id][1]
+        column = self.filter(list_id=list_id, state=state).exclude(id=item_id)
+        upper = (column.filter(Q(position='') | Q(position__gt=lower))
+                       .order_by('position')
+                       .values_list('position', flat=True).first())
+        if upper == '' or (after_id is not None and lower == ''):
+            # Items that were never moved have no key yet.
+            self._rank_unranked(list_id, state)
+            return self.move(item_id, list_id, after_id)
+        position = ranks.key_between(lower, upper)
+        self.filter(id=item_id)._update([list_id], position=position)
+        return position
+
+    def _rank_unranked(self, list_id: int, state: int) -> int:
+        # Keys for the items without one, which come first in the column,
+        # ahead of the first ranked item. Only those rows are written.
+        column = self.filter(list_id=list_id, state=state)
+        items = list(column.filter(position='').only('id', 'position'))
+        first = (column.exclude(position='').order_by('position')
+                       .values_list('position', flat=True).first())
+        for item, position in zip(items, ranks.keys_between('', first,
+                                                            len(items))):
+            item.position = position
+        return self._write_positions(items)
+
+    def rebalance(self, list_id: int, state: int) -> int:
+        # Gives every item of the column a short, evenly spaced key in its
+        # current order. The order does not change, so neither do the labels
+        # nor updated_at. The column is locked from the read to the write so
+        # a concurrent move is not overwritten.
+        with transaction.atomic(using=self.db):
+            items = list(self.filter(list_id=list_id, state=state)
+                             .select_for_update().only('id', 'position'))
+            for item, position in zip(items, ranks.spaced_keys(len(items))):
+                item.position = position
+            return self._write_positions(items)
+
+    def _write_positions(self, items: list) -> int:
+        # Through the base manager: rank keys only restate the order, so the
+        # labels, updated_at and the list version are left alone.
+        return self.model._base_manager.db_manager(self.db).bulk_update(
+            items, ['position'])
+
+    def search(self, query: str, list_id: int = None, state: int = None):
+        # Best match first through the FTS5 index on SQLite, a LIKE scan in
+        # the default order elsewhere. Deleted items only match when asked
+        # for by state.
+        items = self
+        if list_id is not None:
+            items = items.filter(list_id=list_id)
+        if state is not None:
+            items = items.filter(state=state)
+        else:
+            items = items.exclude(state=self.model.ItemState.DELETED)
+        terms = search.terms(query)
+        if not terms:
+            return items.none()
+        if not search.uses_fts(connections[self.db]):
+            for term in terms:
+                items = items.filter(text__icontains=term)
+            return items
+        table = self.model._meta.db_table
+        return items.extra(
+            tables=[search.FTS_TABLE],
+            where=[f'{search.FTS_TABLE}.rowid = {table}.id',
+                   f'{search.FTS_TABLE} MATCH %s'],
+            params=[search.match_expression(terms)],
+            select={'rank': f'{search.FTS_TABLE}.rank'},
+            order_by=['rank'])
+
+    def _transition(self, name: str, item_id: int, list_id: int):
+        # Returns the items to update, the changes and the state step, if
+        # the previous state follows from the new one.
+        ItemState = self.model.ItemState
+        items = self.filter(id=item_id, list_id=list_id)
+        if name == 'delete_item':
+            return (items.exclude(state=ItemState.DELETED),
+                    {'state': ItemState.DELETED}, None)
+        step, bounds = {'state_up': (1, {'state__lt': ItemState.DONE}),
+                        'state_down': (-1, {'state__gt': ItemState.DELETED}),
+                        }[name]
+        # The CASE is evaluated against the old state in the same UPDATE.
+        state_text = self._label_case('state', self.model.STATE_LABELS, step)
+        return (items.filter(**bounds),
+                {'state': F('state') + step, 'state_text': state_text}, step)
+
+    def _apply(self, items, changes: dict, step: int = None) -> int:
+        if step is None:
+            rows = self._update_from_read(items, changes)
+        else:
+            rows = [(item_id, list_id, state - step, state) for
+                    item_id, list_id, state in items._update_returning(
+                        **changes)]
+        history.record([
+            history.transition(item_id, list_id, from_state, state, self.db)
+            for item_id, list_id, from_state, state in rows], self.db)
+        self._bump_lists({list_id for _, list_id, _, _ in rows})
+        return len(rows)
+
+    def _update_from_read(self, items, changes: dict) -> list:
+        # For changes the previous state does not follow from: the states are
+        # read first and the UPDATE only touches rows still in them. Rows
+        # changed in between are updated without the condition and logged
+        # with an unknown previous state. Returns (id, list_id, from_state,
+        # to_state) of every changed row.
+        previous = dict(items.values_list('id', 'state'))
+        if not previous:
+            return []
+        unchanged = Q(*[Q(state=state, id__in=[id_ for id_, old in
+                                                previous.items()
+                                                if old == state])
+                        for state in set(previous.values())],
+                      _connector=Q.OR)
+        rows = [(item_id, list_id, previous[item_id], state) for
+                item_id, list_id, state in items.filter(unchanged)
+                                               ._update_returning(**changes)]
+        if len(rows) < len(previous):
+            changed = items.exclude(id__in=[row[0] for row in rows])
+            rows += [(item_id, list_id, history.UNKNOWN, state) for
+                     item_id, list_id, state in changed._update_returning(
+                         **changes)]
+        return rows
+
+    @staticmethod
+    def _label_case(field: str, labels: dict, offset: int = 0) -> Case:
+        return Case(*[When(**{field: value - offset}, then=Value(label))
+                      for value, label in labels.items()],
+                    default=F(f'{field}_text'))
 
 class Item(models.Model):
     class ItemState(models.IntegerChoices):
@@ -16,6 +394,8 @@ class Item(models.Model):
         HIGH = 2
         VERY_HIGH = 3
         URGENT = 4
+    STATE_LABELS = dict(ItemState.choices)
+    PRIO_LABELS = dict(ItemPrio.choices)
     text = models.TextField(default='')
     list = models.ForeignKey(List, default='', on_delete=models.CASCADE)
     state = models.IntegerField(choices=ItemState.choices,
@@ -24,13 +404,113 @@ class Item(models.Model):
     prio = models.IntegerField(choices=ItemPrio.choices,
                                default=ItemPrio.LOW)
     prio_text = models.CharField(max_length=12,default='')
-    def save(self, *args, **kwargs):
+    updated_at = models.DateTimeField(auto_now=True)
+    # Manual order within a state column, see lists.ranks. Items that were
+    # never moved have no key and come first, by prio.
+    position = models.CharField(max_length=64, default='', blank=True)
+
+    objects = ItemQuerySet.as_manager()
+
+    class Meta:
+        # Matches the index so a list page is a single index range scan.
+        # Deleted rows are left out of it, they are never listed.
+        ordering = ['list', 'state', 'position', 'prio', 'id']
+        indexes = [
+            models.Index(fields=['list', 'state', 'position', 'prio'],
+                         condition=~Q(state=0),
+                         name='item_visible_idx'),
+        ]
+
+    def set_labels(self):
         try:
-            self.state_text = dict(zip(self.ItemState.values, self.ItemState.labels))[self.state]
+            self.state_text = self.STATE_LABELS[self.state]
         except KeyError:
             raise KeyError( f'No state with State ID {self.state} defined!')
         try:
-            self.prio_text = dict(zip(self.ItemPrio.values, self.ItemPrio.labels))[self.prio]
+            self.prio_text = self.PRIO_LABELS[self.prio]
         except KeyError:
             raise KeyError( f'No prio with Prio ID {self.prio} defined!')
+
+    def save(self, *args, **kwargs):
+        self.set_labels()
+        adding = self._state.adding
         super(Item, self).save(*args, **kwargs)
+        if adding:
+            history.record_created([self], self._state.db)
+        List.objects.using(self._state.db).filter(
+            id=self.list_id).bump_version()
+
+    def delete(self, *args, **kwargs):
+        deleted = super().delete(*args, **kwargs)
+        List.objects.using(self._state.db).filter(
+            id=self.list_id).bump_version()
+        return deleted
+
+class ArchivedItem(models.Model):
+    # Deleted items moved out of the item table by lists.archive. They keep
+    # their id so a restore puts them back unchanged.
+    id = models.BigIntegerField(primary_key=True)
+    text = models.TextField(default='')
+    list = models.ForeignKey(List, on_delete=models.CASCADE)
+    state = models.IntegerField(choices=Item.ItemState.choices)
+    prio = models.IntegerField(choices=Item.ItemPrio.choices)
+    updated_at = models.DateTimeField()
+    position = models.CharField(max_length=64, default='', blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+class ItemTransitionQuerySet(models.QuerySet):
+    def states_at(self, list_id: int, at) -> dict:
+        # The state of every logged item of the list at time `at`. Each item
+        # costs one probe of the (item, created_at) index for its last
+        # transition before `at`, the log is not replayed.
+        return dict(self.filter(list_id=list_id)._latest(at)
+                        .values_list('item_id', 'to_state'))
+
+    def state_counts_at(self, list_id: int, at) -> dict:
+        return dict(self.filter(list_id=list_id)._latest(at)
+                        .values_list('to_state')
+                        .annotate(count=Count('id'))
+                        .order_by('to_state'))
+
+    def _latest(self, at=None):
+        transitions = self.model.objects.all()
+        if at is not None:
+            transitions = transitions.filter(created_at__lte=at)
+        later = transitions.filter(
+            Q(created_at__gt=OuterRef('created_at')) |
+            Q(created_at=OuterRef('created_at'), id__gt=OuterRef('id')),
+            item_id=OuterRef('item_id'))
+        latest = self.filter(~Exists(later))
+        if at is not None:
+            latest = latest.filter(created_at__lte=at)
+        return latest
+
+
+class ItemTransition(models.Model):
+    # Append-only, written by lists.history. No database constraints, so
+    # archiving or deleting items and lists leaves the log alone.
+    item = models.ForeignKey(Item, on_delete=models.DO_NOTHING,
+                             db_constraint=False, related_name='+')
+    list = models.ForeignKey(List, on_delete=models.DO_NOTHING,
+                             db_constraint=False, related_name='+')
+    # None for the creation of the item, and for changes whose previous
+    # state was not known; `created` tells them apart.
+    from_state = models.IntegerField(choices=Item.ItemState.choices,
+                                     null=True)
+    to_state = models.IntegerField(choices=Item.ItemState.choices)
+    created = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = ItemTransitionQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['item', 'created_at'],
+                         name='transition_item_idx'),
+            models.Index(fields=['list', 'created_at'],
+                         name='transition_list_idx'),
+        ]
@@ -0,0 +1,61 @@
+"""Lexicographic rank keys for manual item ordering.
+
+Keys are strings over DIGITS that sort in the same order bytewise and in
+the usual collations. A key can always be found between two others, so
+moving an item only rewrites that item's key. Keys never end in '0', which
+keeps that true.
+"""
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def key_between(lower: str = '', upper: str = None) -> str:
+    # A key after `lower` ('' for the start) and before `upper` (None for
+    # the end).
+    if upper is not None:
+        if lower >= upper:
+            raise ValueError(f'{lower!r} is not below {upper!r}')
+        common = 0
+        while (common < len(upper) and
+               (lower[common:common + 1] or '0') == upper[common]):
+            common += 1
+        if common:
+            return upper[:common] + key_between(lower[common:],
+                                                upper[common:])
+    low = DIGITS.index(lower[0]) if lower else 0
+    high = DIGITS.index(upper[0]) if upper is not None else len(DIGITS)
+    if high - low > 1:
+        return DIGITS[(low + high) // 2]
+    if upper is not None and len(upper) > 1:
+        return upper[0]
+    return DIGITS[low] + key_between(lower[1:])
+
+
+def keys_between(lower: str, upper: str, count: int) -> list:
+    # `count` ascending keys between `lower` and `upper`, split evenly so
+    # they grow by about one digit per 36 keys.
+    if count == 0:
+        return []
+    if not lower and upper is None:
+        return spaced_keys(count)
+    middle = key_between(lower, upper)
+    before = count // 2
+    return (keys_between(lower, middle, before) + [middle] +
+            keys_between(middle, upper, count - before - 1))
+
+
+def spaced_keys(count: int) -> list:
+    # `count` ascending keys of the shortest width, evenly spread so later
+    # moves have room on both sides.
+    width = 1
+    while len(DIGITS) ** width <= count:
+        width += 1
+    step = len(DIGITS) ** width / (count + 1)
+    return [_encode(round(step * (i + 1)), width) for i in range(count)]
+
+
+def _encode(value: int, width: int) -> str:
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, len(DIGITS))
+        digits.append(DIGITS[digit])
+    return ''.join(reversed(digits)).rstrip('0')
@@ -0,0 +1,75 @@
+"""Full-text search over Item.text.
+
+On SQLite the text is indexed by an external-content FTS5 table that
+triggers keep in sync, so every write path is covered, bulk_create, update()
+and raw inserts included. Other backends fall back to a LIKE scan, see
+ItemQuerySet.search.
+"""
+FTS_TABLE = 'lists_item_fts'
+ITEM_TABLE = 'lists_item'
+
+CREATE_SQL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"text, content='{ITEM_TABLE}', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert "
+    f"AFTER INSERT ON {ITEM_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete "
+    f"AFTER DELETE ON {ITEM_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update "
+    f"AFTER UPDATE OF text ON {ITEM_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+]
+DROP_SQL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_update',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def uses_fts(connection) -> bool:
+    return connection.vendor == 'sqlite'
+
+
+def install(connection):
+    # Idempotent. SQLite drops the triggers whenever a migration remakes the
+    # item table, so such migrations call this again.
+    if not uses_fts(connection):
+        return
+    with connection.cursor() as cursor:
+        for sql in CREATE_SQL:
+            cursor.execute(sql)
+
+
+def uninstall(connection):
+    if not uses_fts(connection):
+        return
+    with connection.cursor() as cursor:
+        for sql in DROP_SQL:
+            cursor.execute(sql)
+
+
+def rebuild(connection):
+    # Recreates the index from the item table.
+    uninstall(connection)
+    install(connection)
+    if uses_fts(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) "
+                           f"VALUES ('rebuild')")
+
+
+def terms(query: str) -> list:
+    return query.split()
+
+
+def match_expression(terms: list) -> str:
+    # Every term is quoted, so user input never reaches the FTS5 query
+    # syntax, and matched as a prefix. Terms are ANDed.
+    return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
@@ -0,0 +1,126 @@
+"""Content-hashed, precompressed static files and a view that serves them.
+
+CompressedManifestStaticFilesStorage writes the usual hashed copies at
+collectstatic time, plus .gz and, when the optional brotli package is
+installed, .br siblings. serve_static picks the best encoding the client
+accepts. Hashed names never change content, so they are sent with a
+one-year immutable Cache-Control.
+"""
+import gzip
+import mimetypes
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (ManifestStaticFilesStorage,
+                                                staticfiles_storage)
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.map', '.svg', '.eot', '.ttf', '.txt',
+                '.html', '.json')
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        compressed = set()
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run=dry_run, **options):
+            yield name, hashed_name, processed
+            if dry_run or isinstance(processed, Exception):
+                continue
+            for path in (name, hashed_name):
+                if path and path not in compressed and \
+                        path.endswith(COMPRESSIBLE):
+                    compressed.add(path)
+                    self.compress(path)
+
+    def compress(self, name: str):
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            content = source.read()
+        variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(content)
+        for suffix, data in variants.items():
+            # Only keep variants that actually save bytes.
+            if len(data) < len(content):
+                with open(path + suffix, 'wb') as target:
+                    target.write(data)
+
+
+def _hashed_names() -> frozenset:
+    return _load_hashed_names(str(settings.STATIC_ROOT),
+                              settings.STATICFILES_STORAGE)
+
+
+@lru_cache(maxsize=None)
+def _load_hashed_names(static_root: str, storage: str) -> frozenset:
+    # Read from the manifest once per storage configuration, not on every
+    # request.
+    return frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+def _accepted_encodings(header: str) -> dict:
+    # Content codings of an Accept-Encoding header with their q-values,
+    # where q=0 means "not acceptable".
+    accepted = {}
+    for token in header.split(','):
+        name, *params = [part.strip() for part in token.split(';')]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+    return accepted
+
+
+def _pick_encoding(header: str, full_path: str):
+    # The acceptable precompressed variant with the highest q-value, ties
+    # going to the order of ENCODINGS. A '*' covers codings not listed.
+    accepted = _accepted_encodings(header)
+    best, best_quality = (None, full_path), 0.0
+    for name, suffix in ENCODINGS:
+        quality = accepted.get(name, accepted.get('*', 0.0))
+        if quality > best_quality and os.path.isfile(full_path + suffix):
+            best, best_quality = (name, full_path + suffix), quality
+    return best
+
+
+def serve_static(request, path: str):
+    if not settings.STATIC_ROOT:
+        raise Http404('STATIC_ROOT is not set')
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404(path)
+    if not os.path.isfile(full_path):
+        raise Http404(path)
+    content_type, _ = mimetypes.guess_type(full_path)
+    encoding, served_path = _pick_encoding(
+        request.headers.get('Accept-Encoding', ''), full_path)
+    response = FileResponse(open(served_path, 'rb'),
+                            content_type=content_type or
+                            'application/octet-stream')
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ['Accept-Encoding'])
+    if path in _hashed_names():
+        patch_cache_control(response, public=True, max_age=31536000,
+                            immutable=True)
+    else:
+        patch_cache_control(response, no_cache=True)
+    return response
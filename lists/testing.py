@@ -0,0 +1,42 @@
+from django.db import connection, connections
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext
+
+from lists import history
+
+
+class TestRunner(DiscoverRunner):
+    # Writes the history log synchronously, so no row recorded by a test
+    # (or a live server thread) is still buffered when its database is gone.
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._history = override_settings(
+            LISTS_HISTORY_WRITER='lists.history.SyncWriter')
+        self._history.enable()
+
+    def teardown_databases(self, old_config, **kwargs):
+        for alias in connections:
+            history.discard(alias)
+        super().teardown_databases(old_config, **kwargs)
+
+    def teardown_test_environment(self, **kwargs):
+        self._history.disable()
+        super().teardown_test_environment(**kwargs)
+
+
+class QueryBudgetMixin:
+    # For TestCase subclasses: request a path and fail if the view it
+    # resolves to has no @query_budget or runs more queries than declared.
+    def assertWithinQueryBudget(self, path: str, method: str = 'get',
+                                **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(path, **kwargs)
+        view = response.resolver_match.func
+        budget = getattr(view, 'query_budget', None)
+        self.assertIsNotNone(budget, f'{view.__name__} has no query budget')
+        self.assertLessEqual(
+            len(queries), budget,
+            f'{view.__name__} ran {len(queries)} queries, budget {budget}:\n' +
+            '\n'.join(query['sql'] for query in queries.captured_queries))
+        return response
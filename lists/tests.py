@@ -1,8 +1,27 @@
+import gzip
+import io
+import json
+import re
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.db import connection
 from django.http import HttpRequest
-from django.test import TestCase
+from django.template import engines
+from django.test import Client, TestCase, override_settings
 from django.urls import resolve
+from django.utils import timezone
 
-from lists.models import Item, List
+from lists import events, history, ranks, search
+from lists.models import (ArchivedItem, Item, ItemQuerySet, ItemTransition,
+                          List)
+from lists.testing import QueryBudgetMixin
+from lists.transfer import import_rows, read_rows
+from lists.warmup import warm_templates
 
 # Create your tests here.
 class HomePageTest(TestCase):
@@ -11,6 +30,60 @@ class HomePageTest(TestCase):
         response = self.client.get('/')
         self.assertTemplateUsed(response, 'home.html')
 
+    def test_pages_lists_by_cursor(self):
+        lists = [List.objects.create(name=f'List {i}') for i in range(5)]
+        response = self.client.get('/?page_size=2')
+        self.assertEqual(response.context['lists'], lists[:2])
+        self.assertEqual(response.context['next_cursor'], lists[1].id)
+        response = self.client.get(f'/?page_size=2&after={lists[3].id}')
+        self.assertEqual(response.context['lists'], lists[4:])
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_prefix_search_pages_by_name(self):
+        for name in ('Shopping', 'Books', 'Shoes', 'Shop tools'):
+            List.objects.create(name=name)
+        response = self.client.get('/?q=Sho&page_size=2')
+        names = [list_.name for list_ in response.context['lists']]
+        self.assertEqual(names, ['Shoes', 'Shop tools'])
+        self.assertContains(response, 'after=Shop%20tools')
+        response = self.client.get('/?q=Sho&page_size=2&after=Shop+tools')
+        names = [list_.name for list_ in response.context['lists']]
+        self.assertEqual(names, ['Shopping'])
+
+    def test_shows_per_state_counts_in_one_query(self):
+        list_ = List.objects.create(name='List')
+        List.objects.create(name='Empty List')
+        for state in (1, 1, 2, 3, 0):
+            Item.objects.create(text='item', list=list_, state=state)
+        with self.assertNumQueries(2):
+            response = self.client.get('/')
+        counted, empty = response.context['lists']
+        self.assertEqual((counted.open_count, counted.in_progress_count,
+                          counted.done_count), (2, 1, 1))
+        self.assertEqual((empty.open_count, empty.in_progress_count,
+                          empty.done_count), (0, 0, 0))
+
+    def test_counts_only_the_lists_of_the_page(self):
+        # No GROUP BY over every list and no sort before the LIMIT: the page
+        # is read off the index and only its rows run the count subqueries.
+        lists = List.objects.with_item_counts().order_by('id')[:51]
+        self.assertNotIn('GROUP BY', str(lists.query).split('FROM')[-1])
+        self.assertNotIn('TEMP B-TREE', lists.explain())
+
+    def test_answers_matching_etag_with_not_modified(self):
+        List.objects.create(name='List')
+        etag = self.client.get('/')['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get('/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        List.objects.create(name='Other List')
+        response = self.client.get('/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/?after=abc')
+        self.assertEqual(response.status_code, 400)
+
 class ListAndItemModelsTest(TestCase):
     def test_saving_and_retrieving_items(self):
         list_ = List()
@@ -39,8 +112,43 @@ class ListAndItemModelsTest(TestCase):
         self.assertEqual(second_saved_item.text,'Item the second')
         self.assertEqual(second_saved_item.list, list_)
 
+    def test_items_by_state_buckets_visible_items(self):
+        list_ = List.objects.create(name='List')
+        open_item = Item.objects.create(text='open', list=list_)
+        done_item = Item.objects.create(text='done', list=list_, state=3)
+        Item.objects.create(text='deleted', list=list_, state=0)
+        with self.assertNumQueries(1):
+            buckets = list_.items_by_state()
+        self.assertEqual(list(buckets), [1, 2, 3])
+        self.assertEqual(buckets[1], [open_item])
+        self.assertEqual(buckets[2], [])
+        self.assertEqual(buckets[3], [done_item])
+
+    def test_items_are_ordered_by_state_and_prio(self):
+        list_ = List.objects.create(name='List')
+        done = Item.objects.create(text='done', list=list_, state=3)
+        urgent = Item.objects.create(text='urgent', list=list_, prio=4)
+        low = Item.objects.create(text='low', list=list_, prio=1)
+        self.assertEqual(list(list_.item_set.all()), [low, urgent, done])
+
 class ListViewTest(TestCase):
 
+    def test_item_saved_outside_the_views_invalidates_cached_table(self):
+        list_ = List.objects.create(name='List')
+        item = Item.objects.create(text='itemey 1', list=list_)
+        etag = self.client.get(f'/lists/{list_.id}/')['ETag']
+        item.text = 'edited in the admin'
+        item.save()
+        response = self.client.get(f'/lists/{list_.id}/',
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'edited in the admin')
+        Item.objects.filter(id=item.id).update(text='updated in bulk')
+        self.assertContains(self.client.get(f'/lists/{list_.id}/'),
+                            'updated in bulk')
+        item.delete()
+        self.assertNotContains(self.client.get(f'/lists/{list_.id}/'),
+                               'updated in bulk')
+
     def test_uses_list_template(self):
         list_ = List.objects.create(name='List')
         response = self.client.get(f'/lists/{list_.id}/')
@@ -65,6 +173,72 @@ class ListViewTest(TestCase):
         response = self.client.get(f'/lists/{correct_list.id}/')
         self.assertEqual(response.context['list'], correct_list)
 
+    def test_loads_list_and_items_in_two_queries(self):
+        list_ = List.objects.create(name='List')
+        for state in (1, 2, 3):
+            Item.objects.create(text=f'item {state}', list=list_, state=state)
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/lists/{list_.id}/')
+        self.assertEqual(list(response.context['filtered_items']),
+                         ['Open', 'In Progress', 'Done'])
+
+    def test_cached_item_table_skips_item_query(self):
+        list_ = List.objects.create(name='List')
+        Item.objects.create(text='itemey 1', list=list_)
+        self.client.get(f'/lists/{list_.id}/')
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/lists/{list_.id}/')
+        self.assertContains(response, 'itemey 1')
+
+    def test_writes_invalidate_cached_item_table(self):
+        list_ = List.objects.create(name='List')
+        self.client.get(f'/lists/{list_.id}/')
+        self.client.post(f'/lists/{list_.id}/add_item',
+                         data={'item_text': 'itemey 1'})
+        response = self.client.get(f'/lists/{list_.id}/')
+        self.assertContains(response, 'itemey 1')
+        item = Item.objects.get()
+        self.client.post(f'/lists/{list_.id}/{item.id}/delete_item')
+        response = self.client.get(f'/lists/{list_.id}/')
+        self.assertNotContains(response, 'itemey 1')
+
+    def test_blocked_transition_keeps_list_version(self):
+        list_ = List.objects.create(name='List')
+        item = Item.objects.create(text='itemey 1', list=list_, state=3)
+        version = List.objects.get().version
+        self.client.post(f'/lists/{list_.id}/{item.id}/state_up')
+        self.assertEqual(List.objects.get().version, version)
+
+    def test_sends_validators_and_answers_conditional_get(self):
+        list_ = List.objects.create(name='List')
+        response = self.client.get(f'/lists/{list_.id}/')
+        self.assertIn('no-cache', response['Cache-Control'])
+        etag = response['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                f'/lists/{list_.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            f'/lists/{list_.id}/',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_item_change_updates_validators(self):
+        list_ = List.objects.create(name='List')
+        item = Item.objects.create(text='itemey 1', list=list_)
+        etag = self.client.get(f'/lists/{list_.id}/')['ETag']
+        self.client.post(f'/lists/{list_.id}/{item.id}/state_up')
+        response = self.client.get(f'/lists/{list_.id}/',
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_does_not_display_deleted_items(self):
+        list_ = List.objects.create(name='List')
+        Item.objects.create(text='deleted item', list=list_, state=0)
+        response = self.client.get(f'/lists/{list_.id}/')
+        self.assertNotContains(response, 'deleted item')
+
 class NewListTest(TestCase):
     def test_new_list_form_returns_correct_html(self):
         response = self.client.get('/lists/new_form')
@@ -149,7 +323,10 @@ class ItemStateTest(ItemTest):
         new_list, new_item = self.get_new_list_and_new_item()
         new_item.state = 3
         new_item.save()
-        self.assertRaises(KeyError, self.client.post, f'/lists/{new_list.id}/{new_item.id}/state_up')
+        self.client.post(f'/lists/{new_list.id}/{new_item.id}/state_up')
+        new_item = Item.objects.get(id = new_item.id)
+        self.assertEqual(new_item.state, 3)
+        self.assertEqual(new_item.state_text, 'Done')
 
     def test_redirect_after_increase_state(self):
         new_list, new_item = self.get_new_list_and_new_item()
@@ -172,8 +349,10 @@ class ItemStateTest(ItemTest):
         new_list, new_item = self.get_new_list_and_new_item()
         new_item.state = 0
         new_item.save()
-        self.assertRaises(KeyError, self.client.post,
-                          f'/lists/{new_list.id}/{new_item.id}/state_down')
+        self.client.post(f'/lists/{new_list.id}/{new_item.id}/state_down')
+        new_item = Item.objects.get(id = new_item.id)
+        self.assertEqual(new_item.state, 0)
+        self.assertEqual(new_item.state_text, 'Deleted')
 
     def test_redirect_after_decrease_state(self):
         new_list, new_item = self.get_new_list_and_new_item()
@@ -187,11 +366,67 @@ class ItemStateTest(ItemTest):
         self.assertEqual(new_item.state, 0) 
         self.assertEqual(new_item.state_text, 'Deleted')
 
+    def test_state_change_is_a_single_update_and_version_bump(self):
+        new_list, new_item = self.get_new_list_and_new_item()
+        with self.assertNumQueries(2):
+            changed = Item.objects.state_up(new_item.id, new_list.id)
+        self.assertEqual(changed, 1)
+
+    def test_state_change_requires_matching_list(self):
+        new_list, new_item = self.get_new_list_and_new_item()
+        other_list = List.objects.create(name='Another List')
+        self.client.post(f'/lists/{other_list.id}/{new_item.id}/state_up')
+        self.client.post(f'/lists/{other_list.id}/{new_item.id}/delete_item')
+        new_item = Item.objects.get(id = new_item.id)
+        self.assertEqual(new_item.state, 1)
+        self.assertEqual(new_item.state_text, 'Open')
+
     def test_redirect_after_delete_item(self):
         new_list, new_item = self.get_new_list_and_new_item()
         response = self.client.post(f'/lists/{new_list.id}/{new_item.id}/delete_item')
         self.assertRedirects(response, f'/lists/{new_list.id}/')
 
+class BulkUpdateTest(ItemTest):
+    def create_items(self, list_, count=3):
+        return [Item.objects.create(text=f'item {i}', list=list_)
+                for i in range(count)]
+
+    def test_bulk_state_and_prio_change_is_a_single_update(self):
+        list_ = List.objects.create(name='List')
+        items = self.create_items(list_)
+        # Plus the read of the replaced states and the list version bump.
+        with self.assertNumQueries(3):
+            changed = Item.objects.bulk_change(list_.id,
+                                               [item.id for item in items],
+                                               state=3, prio=4)
+        self.assertEqual(changed, 3)
+        for item in Item.objects.all():
+            self.assertEqual((item.state_text, item.prio_text),
+                             ('Done', 'Urgent'))
+
+    def test_bulk_delete_only_touches_selected_items_of_list(self):
+        list_ = List.objects.create(name='List')
+        other_list = List.objects.create(name='Other List')
+        first, second, _ = self.create_items(list_)
+        other_item = Item.objects.create(text='other', list=other_list)
+        response = self.client.post(
+            f'/lists/{list_.id}/bulk_update',
+            data={'item_ids': [first.id, second.id, other_item.id],
+                  'delete': 'on'})
+        self.assertRedirects(response, f'/lists/{list_.id}/')
+        self.assertEqual(
+            list(Item.objects.filter(state=0).values_list('id', flat=True)),
+            [first.id, second.id])
+
+    def test_bulk_update_rejects_unknown_state(self):
+        list_ = List.objects.create(name='List')
+        items = self.create_items(list_, 1)
+        response = self.client.post(f'/lists/{list_.id}/bulk_update',
+                                    data={'item_ids': [items[0].id],
+                                          'state': 7})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Item.objects.get().state, 1)
+
 class ItemPrioTest(ItemTest):
     def test_new_item_has_prio_low(self):
         _, new_item = self.get_new_list_and_new_item()
@@ -208,3 +443,761 @@ class ItemPrioTest(ItemTest):
            new_item.prio = i
            new_item.save()
            self.assertEqual(new_item.prio_text, prio)
+
+
+class ItemLabelTest(TestCase):
+    def setUp(self):
+        self.list_ = List.objects.create(name='List')
+
+    def test_bulk_create_sets_labels(self):
+        Item.objects.bulk_create([Item(text='a', list=self.list_, state=2,
+                                       prio=4)])
+        item = Item.objects.get()
+        self.assertEqual((item.state_text, item.prio_text),
+                         ('In Progress', 'Urgent'))
+
+    def test_update_sets_labels_in_same_query(self):
+        Item.objects.create(text='a', list=self.list_)
+        # The lists are read first and their versions bumped after.
+        with self.assertNumQueries(3):
+            Item.objects.update(state=3, prio=0)
+        item = Item.objects.get()
+        self.assertEqual((item.state_text, item.prio_text),
+                         ('Done', 'Very Low'))
+
+    def test_bulk_update_sets_labels(self):
+        item = Item.objects.create(text='a', list=self.list_)
+        item.state = 2
+        Item.objects.bulk_update([item], ['state'])
+        self.assertEqual(Item.objects.get().state_text, 'In Progress')
+
+    def test_relabel_fixes_stale_labels(self):
+        Item.objects.create(text='a', list=self.list_, state=3, prio=2)
+        Item.objects.update(state_text='stale', prio_text='stale')
+        Item.objects.relabel()
+        item = Item.objects.get()
+        self.assertEqual((item.state_text, item.prio_text), ('Done', 'High'))
+
+class TransferTest(TestCase):
+    def test_import_creates_lists_by_name_in_batches(self):
+        List.objects.create(name='Existing')
+        rows = '\n'.join(json.dumps(row) for row in (
+            {'list': 'Existing', 'text': 'a', 'state': 2, 'prio': 4},
+            {'list': 'New', 'text': 'b'},
+            {'list': 'New', 'text': 'c', 'state': 3},
+        ))
+        with self.assertNumQueries(12):
+            imported = import_rows(read_rows(io.StringIO(rows)), batch_size=2)
+        self.assertEqual(imported, 3)
+        self.assertEqual(List.objects.count(), 2)
+        item = Item.objects.get(text='a')
+        self.assertEqual(item.list.name, 'Existing')
+        self.assertEqual((item.state_text, item.prio_text),
+                         ('In Progress', 'Urgent'))
+        self.assertEqual(Item.objects.get(text='b').prio_text, 'Low')
+
+    def test_export_and_import_csv_round_trip(self):
+        list_ = List.objects.create(name='List')
+        Item.objects.create(text='a, with comma', list=list_, prio=3)
+        output = io.StringIO()
+        call_command('export_items', format='csv', stdout=output)
+        Item.objects.all().delete()
+        imported = import_rows(read_rows(io.StringIO(output.getvalue()),
+                                         'csv'))
+        self.assertEqual(imported, 1)
+        item = Item.objects.get()
+        self.assertEqual((item.text, item.list, item.prio),
+                         ('a, with comma', list_, 3))
+
+    def test_jsonl_round_trip_keeps_zero_state_and_prio(self):
+        list_ = List.objects.create(name='List')
+        Item.objects.create(text='gone', list=list_, state=0, prio=0)
+        output = io.StringIO()
+        call_command('export_items', stdout=output)
+        Item.objects.all().delete()
+        import_rows(read_rows(io.StringIO(output.getvalue())))
+        item = Item.objects.get()
+        self.assertEqual((item.text, item.state, item.prio), ('gone', 0, 0))
+
+    def test_export_view_streams_items_of_list(self):
+        list_ = List.objects.create(name='List')
+        other_list = List.objects.create(name='Other List')
+        Item.objects.create(text='mine', list=list_)
+        Item.objects.create(text='other', list=other_list)
+        response = self.client.get(f'/lists/{list_.id}/export')
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in
+                b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(rows, [{'list': 'List', 'text': 'mine',
+                                 'state': 1, 'prio': 1}])
+
+    async def test_export_view_is_refused_under_asgi(self):
+        response = await self.async_client.get('/lists/export')
+        self.assertEqual(response.status_code, 501)
+
+
+@override_settings(ROOT_URLCONF='superlists.async_urls')
+class AsyncViewsTest(TestCase):
+    async def test_export_is_not_routed(self):
+        list_ = await List.objects.acreate(name='List')
+        response = await self.async_client.get(f'/lists/{list_.id}/export')
+        self.assertEqual(response.status_code, 404)
+
+    async def test_event_stream_is_not_routed(self):
+        list_ = await List.objects.acreate(name='List')
+        response = await self.async_client.get(f'/lists/{list_.id}/events')
+        self.assertEqual(response.status_code, 404)
+
+    async def test_home_page_lists_counts(self):
+        list_ = await List.objects.acreate(name='List')
+        await Item.objects.acreate(text='itemey 1', list=list_)
+        response = await self.async_client.get('/')
+        self.assertTemplateUsed(response, 'home.html')
+        self.assertEqual(response.context['lists'][0].open_count, 1)
+
+    async def test_add_item_and_transitions(self):
+        list_ = await List.objects.acreate(name='List')
+        response = await self.async_client.post(
+            f'/lists/{list_.id}/add_item', data='item_text=itemey+1',
+            content_type='application/x-www-form-urlencoded')
+        self.assertRedirects(response, f'/lists/{list_.id}/',
+                             fetch_redirect_response=False)
+        item = await Item.objects.aget()
+        await self.async_client.get(f'/lists/{list_.id}/{item.id}/state_up')
+        await self.async_client.get(f'/lists/{list_.id}/{item.id}/state_up')
+        await self.async_client.get(f'/lists/{list_.id}/{item.id}/state_down')
+        item = await Item.objects.aget()
+        self.assertEqual((item.state, item.state_text), (2, 'In Progress'))
+        response = await self.async_client.get(f'/lists/{list_.id}/')
+        self.assertContains(response, 'itemey 1')
+        await self.async_client.get(f'/lists/{list_.id}/{item.id}/delete_item')
+        response = await self.async_client.get(f'/lists/{list_.id}/')
+        self.assertNotContains(response, 'itemey 1')
+
+
+class RecordingHub(events.EventHub):
+    published = []
+
+    def publish(self, list_id, event):
+        self.published.append((list_id, event))
+
+@override_settings(LISTS_EVENT_HUB='lists.tests.RecordingHub')
+class ListEventsPublishTest(ItemTest):
+    def setUp(self):
+        RecordingHub.published = []
+
+    def test_writes_publish_deltas(self):
+        list_, item = self.get_new_list_and_new_item()
+        self.client.post(f'/lists/{list_.id}/{item.id}/state_up')
+        self.client.post(f'/lists/{list_.id}/{item.id}/delete_item')
+        self.client.post(f'/lists/{list_.id}/{item.id}/delete_item')
+        types = [event['type'] for _, event in RecordingHub.published]
+        self.assertEqual(types, ['add', 'state_up', 'delete_item'])
+        self.assertEqual(RecordingHub.published[0],
+                         (list_.id, {'type': 'add', 'list': list_.id,
+                                     'item': events.item_data(item)}))
+
+class ListEventsStreamTest(ItemTest):
+    def test_stream_sends_events_of_its_list(self):
+        list_ = List.objects.create(name='List')
+        other_list = List.objects.create(name='Other List')
+        response = self.client.get(f'/lists/{list_.id}/events')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        frames = iter(response.streaming_content)
+        self.assertEqual(next(frames), b'retry: 5000\n\n')
+        self.add_new_item_to_existing_list(other_list)
+        self.add_new_item_to_existing_list(list_)
+        frame = next(frames).decode()
+        self.assertTrue(frame.startswith('event: add\n'))
+        self.assertIn('A new item for an existing list', frame)
+        response.close()
+        self.assertNotIn(list_.id, events.get_hub()._subscriptions)
+
+    async def test_stream_is_refused_under_asgi(self):
+        list_ = await List.objects.acreate(name='List')
+        response = await self.async_client.get(f'/lists/{list_.id}/events')
+        self.assertEqual(response.status_code, 501)
+        self.assertNotIn(list_.id, events.get_hub()._subscriptions)
+
+    def test_stream_sends_keepalive_when_idle(self):
+        list_ = List.objects.create(name='List')
+        subscription = events.get_hub().subscribe(list_.id)
+        frames = events.stream(subscription, heartbeat=0.01)
+        next(frames)
+        self.assertEqual(next(frames), ': keepalive\n\n')
+        frames.close()
+
+
+class ApiTest(TestCase):
+    def setUp(self):
+        self.list_ = List.objects.create(name='List')
+        self.items = [Item.objects.create(text=f'item {i}', list=self.list_,
+                                          state=1 + i % 3)
+                      for i in range(5)]
+
+    def test_list_detail_with_sparse_fields(self):
+        response = self.client.get(f'/api/lists/{self.list_.id}/?fields=name')
+        self.assertEqual(response.json(), {'name': 'List'})
+
+    def test_missing_detail_is_404(self):
+        response = self.client.get('/api/items/999/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get('/api/items/?fields=id,secret')
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_fetch_is_one_query(self):
+        ids = [self.items[3].id, self.items[0].id]
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                f"/api/items/?ids={','.join(map(str, ids))}&fields=id,list")
+        self.assertEqual(response.json()['results'],
+                         [{'id': self.items[0].id, 'list': self.list_.id},
+                          {'id': self.items[3].id, 'list': self.list_.id}])
+
+    def test_items_page_by_cursor_and_filter_by_state(self):
+        response = self.client.get(
+            f'/api/items/?list={self.list_.id}&state=1,2'
+            '&fields=text&page_size=2')
+        data = response.json()
+        self.assertEqual(data['results'], [{'text': 'item 0'},
+                                           {'text': 'item 1'}])
+        response = self.client.get(
+            f"/api/items/?state=1,2&fields=text&after={data['next']}")
+        self.assertEqual(response.json(), {'results': [{'text': 'item 3'},
+                                                       {'text': 'item 4'}],
+                                           'next': None})
+
+
+class SqlitePragmaTest(TestCase):
+    def test_connections_get_pragma_profile(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.list_ = List.objects.create(name='List')
+        self.items = [Item.objects.create(text=f'item {i}', list=self.list_,
+                                          state=1 + i % 3)
+                      for i in range(6)]
+        self.item = self.items[0]
+
+    def test_read_views_stay_within_budget(self):
+        List.objects.create(name='Other List')
+        self.assertWithinQueryBudget('/')
+        self.assertWithinQueryBudget(f'/lists/{self.list_.id}/')
+        self.assertWithinQueryBudget(f'/api/items/?list={self.list_.id}')
+
+    def test_write_views_stay_within_budget(self):
+        base = f'/lists/{self.list_.id}'
+        self.assertWithinQueryBudget('/lists/new', 'post',
+                                     data={'list_name': 'New List'})
+        self.assertWithinQueryBudget(f'{base}/add_item', 'post',
+                                     data={'item_text': 'new item'})
+        for action in ('state_up', 'state_down', 'delete_item'):
+            self.assertWithinQueryBudget(f'{base}/{self.item.id}/{action}',
+                                         'post')
+        self.assertWithinQueryBudget(
+            f'{base}/bulk_update', 'post',
+            data={'item_ids': [item.id for item in self.items], 'state': 3})
+
+@override_settings(MIDDLEWARE=[
+    'lists.instrumentation.InstrumentationMiddleware',
+    *settings.MIDDLEWARE])
+class InstrumentationMiddlewareTest(TestCase):
+    def test_reports_server_timing_and_logs_request(self):
+        list_ = List.objects.create(name='List')
+        with self.assertLogs('lists.instrumentation', 'INFO') as logs:
+            response = self.client.get(f'/lists/{list_.id}/')
+        self.assertRegex(response['Server-Timing'],
+                         r'^db;dur=[\d.]+;desc="2 queries", '
+                         r'tpl;dur=[\d.]+, total;dur=[\d.]+$')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'lists.views.view_list')
+        self.assertEqual((record['queries'], record['query_budget']), (2, 2))
+        self.assertGreater(record['template_ms'], 0)
+
+
+class StaticFilesTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(
+            STATIC_ROOT=directory.name,
+            STATICFILES_STORAGE='lists.staticfiles.'
+                                'CompressedManifestStaticFilesStorage')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def test_serves_hashed_files_precompressed_and_immutable(self):
+        url = staticfiles_storage.url('lists/base.css')
+        self.assertRegex(url, r'/static/lists/base\.[0-9a-f]{12}\.css$')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertIn(b'.item_box', body)
+
+    def test_serves_unhashed_name_uncompressed_when_not_accepted(self):
+        response = self.client.get('/static/lists/base.css')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_honours_q_values_of_accept_encoding(self):
+        url = staticfiles_storage.url('lists/base.css')
+        for accept, encoding in (('gzip;q=0', None), ('gzip;q=0, *', None),
+                                 ('br-like, gzip;q=0.5', 'gzip'),
+                                 ('GZip; q=0.8', 'gzip'), ('*', 'gzip'),
+                                 ('identity', None)):
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING=accept)
+            self.assertEqual(response.get('Content-Encoding'), encoding,
+                             accept)
+
+    def test_rejects_paths_outside_static_root(self):
+        response = self.client.get('/static/../manage.py')
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(TEMPLATES=[{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'OPTIONS': {'loaders': [('django.template.loaders.cached.Loader',
+                             ['django.template.loaders.app_directories.Loader'])]},
+}])
+class TemplateWarmupTest(TestCase):
+
+    def test_warmup_fills_the_cached_loader(self):
+        names = warm_templates()
+        self.assertIn('list.html', names)
+        self.assertIn('list_items.html', names)
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertTrue(set(names) <= set(loader.get_template_cache))
+
+    def test_render_benchmark_reports_both_loaders(self):
+        out = io.StringIO()
+        call_command('benchmark_templates', items=2, renders=2, stdout=out)
+        results = json.loads(out.getvalue())['results']
+        self.assertEqual(set(results), {'uncached', 'cached'})
+        self.assertEqual(results['cached']['requests'], 2)
+
+
+class SearchTest(TestCase):
+
+    def setUp(self):
+        self.list_ = List.objects.create(name='Groceries')
+        self.other = List.objects.create(name='Errands')
+        Item.objects.create(text='buy milk', list=self.list_)
+        Item.objects.create(text='milk, milk and more milk', list=self.list_)
+        Item.objects.bulk_create([Item(text='pick up milk', list=self.other),
+                                  Item(text='call mom', list=self.other)])
+
+    def texts(self, items) -> list:
+        return [item.text for item in items]
+
+    def test_ranks_prefix_matches_across_lists(self):
+        self.assertEqual(self.texts(Item.objects.search('mil')),
+                         ['milk, milk and more milk', 'buy milk',
+                          'pick up milk'])
+        self.assertEqual(self.texts(Item.objects.search('milk buy')),
+                         ['buy milk'])
+        self.assertEqual(self.texts(Item.objects.search('"')), [])
+
+    def test_filters_by_list_and_state(self):
+        items = Item.objects.filter(text='buy milk')
+        items.update(state=Item.ItemState.DONE)
+        self.assertEqual(
+            self.texts(Item.objects.search('milk', list_id=self.list_.id)),
+            ['milk, milk and more milk', 'buy milk'])
+        self.assertEqual(self.texts(Item.objects.search(
+            'milk', state=Item.ItemState.DONE)), ['buy milk'])
+        items.update(state=Item.ItemState.DELETED)
+        self.assertNotIn('buy milk', self.texts(Item.objects.search('milk')))
+
+    def test_index_follows_updates_and_deletes(self):
+        Item.objects.filter(text='call mom').update(text='call milkman')
+        self.assertIn('call milkman', self.texts(Item.objects.search('milk')))
+        self.assertEqual(list(Item.objects.search('mom')), [])
+        self.other.delete()
+        self.assertEqual(self.texts(Item.objects.search('milk')),
+                         ['milk, milk and more milk', 'buy milk'])
+
+    def test_rebuild_command_restores_the_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {search.FTS_TABLE}"
+                           f"({search.FTS_TABLE}) VALUES ('delete-all')")
+        self.assertEqual(list(Item.objects.search('milk')), [])
+        call_command('rebuild_search_index', stderr=io.StringIO())
+        self.assertEqual(len(Item.objects.search('milk')), 3)
+
+    def test_falls_back_to_like_scan(self):
+        with mock.patch('lists.search.uses_fts', return_value=False):
+            items = Item.objects.search('MILK up')
+            self.assertNotIn(search.FTS_TABLE, str(items.query))
+            self.assertEqual(self.texts(items), ['pick up milk'])
+
+    def test_search_page(self):
+        response = self.client.get('/lists/search', {'q': 'milk',
+                                                     'list': self.other.id})
+        self.assertTemplateUsed(response, 'search.html')
+        self.assertEqual(self.texts(response.context['items']),
+                         ['pick up milk'])
+        self.assertContains(response, f'href="/lists/{self.other.id}/"')
+        response = self.client.get('/lists/search', {'q': 'milk',
+                                                      'state': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ArchiveTest(TestCase):
+
+    def setUp(self):
+        self.list_ = List.objects.create(name='Chores')
+        self.items = Item.objects.bulk_create(
+            [Item(text=f'Chore {i}', list=self.list_) for i in range(5)])
+        old = timezone.now() - timedelta(days=100)
+        Item.objects.filter(id__in=[item.id for item in self.items[:3]]
+                            ).update(state=Item.ItemState.DELETED,
+                                     updated_at=old)
+        Item.objects.filter(id=self.items[3].id).update(
+            state=Item.ItemState.DELETED)
+
+    def test_list_page_uses_the_partial_index(self):
+        plan = self.list_.item_set.exclude(
+            state=Item.ItemState.DELETED).explain()
+        self.assertIn('item_visible_idx', plan)
+
+    def test_archives_old_deleted_items_in_batches(self):
+        # Two batches of SELECT, INSERT and DELETE, then an empty SELECT,
+        # each in its own savepoint.
+        with self.assertNumQueries(13):
+            call_command('archive_items', days=90, batch_size=2,
+                         stderr=io.StringIO())
+        self.assertEqual(list(ArchivedItem.objects.values_list('id',
+                                                               flat=True)),
+                         [item.id for item in self.items[:3]])
+        self.assertEqual(Item.objects.count(), 2)
+        self.assertEqual(ArchivedItem.objects.first().text, 'Chore 0')
+
+    def test_restore_puts_items_back_deleted(self):
+        call_command('archive_items', days=90, stderr=io.StringIO())
+        call_command('archive_items', restore=True, list=self.list_.id,
+                     stderr=io.StringIO())
+        self.assertFalse(ArchivedItem.objects.exists())
+        restored = Item.objects.get(id=self.items[0].id)
+        self.assertEqual((restored.text, restored.state, restored.state_text),
+                         ('Chore 0', Item.ItemState.DELETED, 'Deleted'))
+        self.assertEqual(len(Item.objects.search('Chore',
+                                                 state=Item.ItemState.DELETED)),
+                         4)
+
+
+class RankTest(TestCase):
+
+    def test_spreads_keys_between_bounds(self):
+        keys = ranks.keys_between('a', 'b', 100)
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), 100)
+        self.assertTrue(all('a' < key < 'b' for key in keys))
+        self.assertLessEqual(max(map(len, keys)), 4)
+
+    def test_keys_between_neighbours_stay_ordered(self):
+        keys = ranks.spaced_keys(3)
+        self.assertEqual(keys, sorted(keys))
+        for _ in range(40):
+            keys.insert(1, ranks.key_between(keys[0], keys[1]))
+            keys.insert(0, ranks.key_between('', keys[0]))
+            keys.append(ranks.key_between(keys[-1]))
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(keys), len(set(keys)))
+        self.assertFalse(any(key.endswith('0') for key in keys))
+
+
+class MoveItemTest(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.list_ = List.objects.create(name='Ordered')
+        self.items = [Item.objects.create(text=f'item {i}', list=self.list_)
+                      for i in range(4)]
+
+    def texts(self) -> list:
+        return [item.text for item in self.list_.items_by_state()[1]]
+
+    def move(self, item: Item, after: Item = None):
+        return self.client.post(
+            f'/lists/{self.list_.id}/{item.id}/move',
+            {'after': after.id} if after else {})
+
+    def test_moves_within_the_state_column(self):
+        response = self.move(self.items[3], after=self.items[0])
+        self.assertRedirects(response, f'/lists/{self.list_.id}/')
+        self.assertEqual(self.texts(), ['item 0', 'item 3', 'item 1',
+                                        'item 2'])
+        self.move(self.items[2])
+        self.assertEqual(self.texts(), ['item 2', 'item 0', 'item 3',
+                                        'item 1'])
+
+    def test_move_in_a_ranked_column_updates_one_row(self):
+        Item.objects.rebalance(self.list_.id, Item.ItemState.OPEN)
+        # Two reads, the single-row UPDATE and the list version bump.
+        with self.assertNumQueries(4):
+            Item.objects.move(self.items[0].id, self.list_.id,
+                              self.items[2].id)
+        self.assertEqual(self.texts(), ['item 1', 'item 2', 'item 0',
+                                        'item 3'])
+
+    def test_new_items_are_ranked_without_rewriting_the_column(self):
+        self.move(self.items[3], after=self.items[0])
+        positions = dict(Item.objects.values_list('id', 'position'))
+        new = [Item.objects.create(text=f'new {i}', list=self.list_)
+               for i in range(2)]
+        self.move(self.items[1], after=new[1])
+        self.assertEqual(self.texts(), ['new 0', 'new 1', 'item 1',
+                                        'item 0', 'item 3', 'item 2'])
+        for item in self.items[::2]:
+            self.assertEqual(Item.objects.get(id=item.id).position,
+                             positions[item.id])
+
+    def test_first_move_after_adding_stays_within_budget(self):
+        self.move(self.items[3], after=self.items[0])
+        new = Item.objects.create(text='new', list=self.list_)
+        self.assertWithinQueryBudget(
+            f'/lists/{self.list_.id}/{self.items[1].id}/move', 'post',
+            data={'after': new.id})
+
+    def test_move_requires_post(self):
+        response = self.client.get(
+            f'/lists/{self.list_.id}/{self.items[3].id}/move')
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(self.texts(), ['item 0', 'item 1', 'item 2',
+                                        'item 3'])
+
+    def test_rejects_items_of_another_column(self):
+        Item.objects.state_up(self.items[1].id, self.list_.id)
+        response = self.move(self.items[0], after=self.items[1])
+        self.assertEqual(response.status_code, 400)
+        response = self.move(self.items[0], after=self.items[0])
+        self.assertEqual(response.status_code, 400)
+
+    def test_long_keys_are_rebalanced_after_commit(self):
+        with override_settings(LISTS_RANK_MAX_LENGTH=0), \
+                self.captureOnCommitCallbacks() as callbacks:
+            self.move(self.items[3], after=self.items[0])
+        self.assertEqual(len(callbacks), 1)
+
+    def test_rebalance_keeps_the_order(self):
+        for _ in range(20):
+            Item.objects.move(self.items[3].id, self.list_.id)
+            Item.objects.move(self.items[2].id, self.list_.id)
+        before = self.texts()
+        self.list_.refresh_from_db()
+        updated_at = dict(Item.objects.values_list('id', 'updated_at'))
+        Item.objects.rebalance(self.list_.id, Item.ItemState.OPEN)
+        self.assertEqual(self.texts(), before)
+        self.assertEqual(dict(Item.objects.values_list('id', 'updated_at')),
+                         updated_at)
+        self.assertEqual(List.objects.get(id=self.list_.id).version,
+                         self.list_.version)
+        self.assertEqual({len(position) for position in
+                          Item.objects.values_list('position', flat=True)},
+                         {1})
+
+
+@override_settings(LISTS_HISTORY_WRITER='lists.history.SyncWriter')
+class HistoryTest(TestCase):
+
+    def setUp(self):
+        self.list_ = List.objects.create(name='Tracked')
+
+    def log(self) -> list:
+        return list(ItemTransition.objects.values_list('from_state',
+                                                       'to_state'))
+
+    def test_logs_creation_and_transitions_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            item = Item.objects.create(text='a', list=self.list_)
+            for transition in ('state_up', 'state_up', 'state_up',
+                               'state_down', 'delete_item', 'delete_item'):
+                getattr(Item.objects, transition)(item.id, self.list_.id)
+        self.assertEqual(self.log(), [(None, 1), (1, 2), (2, 3), (3, 2),
+                                      (2, 0)])
+
+    def test_transition_stays_a_single_statement(self):
+        item = Item.objects.create(text='a', list=self.list_)
+        with self.captureOnCommitCallbacks() as callbacks, \
+                self.assertNumQueries(2):
+            Item.objects.state_up(item.id, self.list_.id)
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(ItemTransition.objects.exists())
+
+    def test_bulk_change_logs_the_states_it_replaces(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            items = Item.objects.bulk_create(
+                [Item(text=f'item {i}', list=self.list_) for i in range(2)])
+            Item.objects.state_up(items[0].id, self.list_.id)
+            Item.objects.bulk_change(self.list_.id,
+                                     [item.id for item in items], state=3)
+            Item.objects.bulk_change(self.list_.id, [items[0].id], prio=4)
+        self.assertEqual(self.log(), [(None, 1), (None, 1), (1, 2), (2, 3),
+                                      (1, 3)])
+
+    def test_delete_logs_the_state_it_replaces(self):
+        # Even if that state was never logged.
+        item = Item.objects.create(text='a', list=self.list_)
+        Item._base_manager.filter(id=item.id).update(state=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.delete_item(item.id, self.list_.id)
+        self.assertEqual(list(ItemTransition.objects.values_list(
+            'from_state', 'to_state', 'created')), [(3, 0, False)])
+
+    def test_state_changed_in_between_is_logged_as_unknown(self):
+        items = [Item.objects.create(text=text, list=self.list_)
+                 for text in 'ab']
+        values_list = ItemQuerySet.values_list
+
+        def read_then_change(queryset, *fields, **kwargs):
+            # Another request moves item b on right after the read.
+            rows = list(values_list(queryset, *fields, **kwargs))
+            Item._base_manager.filter(id=items[1].id).update(state=2)
+            return rows
+
+        with self.captureOnCommitCallbacks(execute=True), \
+                mock.patch.object(ItemQuerySet, 'values_list',
+                                  read_then_change):
+            changed = Item.objects.bulk_change(
+                self.list_.id, [item.id for item in items], state=3)
+        self.assertEqual(changed, 2)
+        self.assertEqual(set(ItemTransition.objects.values_list(
+            'item_id', 'from_state', 'to_state', 'created')),
+            {(items[0].id, 1, 3, False), (items[1].id, None, 3, False)})
+
+    def test_restore_from_archive_is_not_logged(self):
+        item = Item.objects.create(text='a', list=self.list_, state=0)
+        Item.objects.filter(id=item.id).update(
+            updated_at=timezone.now() - timedelta(days=100))
+        call_command('archive_items', days=90, stderr=io.StringIO())
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archive_items', restore=True, stderr=io.StringIO())
+        self.assertTrue(Item.objects.filter(id=item.id).exists())
+        self.assertFalse(ItemTransition.objects.exists())
+
+    @override_settings(LISTS_HISTORY_FLUSH_SIZE=3,
+                       LISTS_HISTORY_FLUSH_INTERVAL=60)
+    def test_buffered_writer_flushes_in_batches(self):
+        writer = history.BufferedWriter()
+        item = Item.objects.create(text='a', list=self.list_)
+        for state in (1, 2, 3, 2):
+            writer.record(history.transition(item.id, self.list_.id,
+                                             state - 1, state))
+        self.assertEqual(ItemTransition.objects.count(), 3)
+        with self.assertNumQueries(1):
+            self.assertEqual(writer.flush(), 1)
+        self.assertEqual(writer.flush(), 0)
+        self.assertEqual(ItemTransition.objects.count(), 4)
+
+    def test_buffered_rows_are_not_written_to_another_database(self):
+        writer = history.BufferedWriter()
+        item = Item.objects.create(text='a', list=self.list_)
+        writer.record(history.transition(item.id, self.list_.id, 1, 2))
+        with mock.patch.dict(connection.settings_dict, NAME='other.sqlite3'):
+            self.assertEqual(writer.flush(), 0)
+        writer.record(history.transition(item.id, self.list_.id, 1, 2))
+        writer.discard(connection.alias)
+        self.assertEqual(writer.flush(), 0)
+        self.assertFalse(ItemTransition.objects.exists())
+
+    def test_states_at_a_point_in_time(self):
+        start = timezone.now()
+        a = Item.objects.create(text='a', list=self.list_)
+        b = Item.objects.create(text='b', list=self.list_)
+        ItemTransition.objects.bulk_create([
+            ItemTransition(item=item, list=self.list_, from_state=from_state,
+                           to_state=to_state,
+                           created_at=start + timedelta(hours=hours))
+            for item, from_state, to_state, hours in (
+                (a, None, 1, 0), (b, None, 1, 0), (a, 1, 2, 1),
+                (a, 2, 3, 2), (b, 1, 0, 3))])
+        at = start + timedelta(hours=1, minutes=30)
+        self.assertEqual(ItemTransition.objects.states_at(self.list_.id, at),
+                         {a.id: 2, b.id: 1})
+        self.assertEqual(ItemTransition.objects.state_counts_at(
+            self.list_.id, start + timedelta(hours=5)), {0: 1, 3: 1})
+        self.assertEqual(ItemTransition.objects.states_at(
+            self.list_.id, start - timedelta(hours=1)), {})
+
+
+class StreamingListTest(TestCase):
+
+    def setUp(self):
+        self.list_ = List.objects.create(name='Big List')
+        Item.objects.bulk_create(
+            [Item(text=f'item {i}', list=self.list_, state=i % 3 + 1,
+                  prio=i % 5) for i in range(30)])
+
+    def page(self, response) -> str:
+        if response.streaming:
+            content = b''.join(response.streaming_content)
+        else:
+            content = response.content
+        content = re.sub(rb'name="csrfmiddlewaretoken" value="\w+"', b'',
+                         content)
+        return ' '.join(content.decode().split())
+
+    def test_streamed_page_matches_the_rendered_one(self):
+        url = f'/lists/{self.list_.id}/'
+        streamed = self.client.get(url, {'stream': 1})
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(self.page(streamed), self.page(self.client.get(url)))
+
+    def test_streamed_page_sets_the_csrf_cookie_for_its_form(self):
+        client = Client(enforce_csrf_checks=True)
+        response = client.get(f'/lists/{self.list_.id}/', {'stream': 1})
+        self.assertTrue(response.streaming)
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        token = re.search(rb'name="csrfmiddlewaretoken" value="(\w+)"',
+                          b''.join(response.streaming_content)).group(1)
+        response = client.post(f'/lists/{self.list_.id}/bulk_update',
+                               {'csrfmiddlewaretoken': token.decode(),
+                                'prio': 4})
+        self.assertEqual(response.status_code, 302)
+
+    async def test_renders_the_whole_page_under_asgi(self):
+        response = await self.async_client.get(f'/lists/{self.list_.id}/',
+                                               {'stream': 1})
+        self.assertFalse(response.streaming)
+        self.assertIn(b'item 29', response.content)
+
+    def test_sends_the_head_before_reading_items(self):
+        response = self.client.get(f'/lists/{self.list_.id}/',
+                                   {'stream': 1})
+        chunks = iter(response.streaming_content)
+        with self.assertNumQueries(0):
+            head = next(chunks)
+        self.assertIn(b'Big List', head)
+        self.assertIn(b'navbar', head)
+        with self.assertNumQueries(1):
+            next(chunks)
+
+    @override_settings(LISTS_STREAM_LIST=True, LISTS_STREAM_DONE_LIMIT=4)
+    def test_caps_done_column_behind_load_more(self):
+        response = self.client.get(f'/lists/{self.list_.id}/')
+        page = self.page(response)
+        self.assertIn('id_item_4_3_state', page)
+        self.assertNotIn('id_item_5_3_state', page)
+        self.assertIn('id_item_10_1_state', page)
+        self.assertIn(f'/lists/{self.list_.id}/?stream=1&amp;done_limit=8',
+                      page)
+        page = self.page(self.client.get(f'/lists/{self.list_.id}/',
+                                         {'done_limit': 10}))
+        self.assertIn('id_item_10_3_state', page)
+        self.assertNotIn('id_load_more_3', page)
+        response = self.client.get(f'/lists/{self.list_.id}/',
+                                   {'done_limit': 'x'})
+        self.assertEqual(response.status_code, 400)
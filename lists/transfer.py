@@ -0,0 +1,85 @@
+"""Bulk import and export of items as JSON Lines or CSV.
+
+Rows are flat dicts with the keys in FIELDS; lists are referenced by their
+unique name. Both directions work on iterators so memory stays flat no matter
+how many items are moved.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+
+from lists.models import Item, List
+
+FIELDS = ['list', 'text', 'state', 'prio']
+FORMATS = ['jsonl', 'csv']
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    # csv.writer wants a file; this one hands each formatted line back.
+    def write(self, value):
+        return value
+
+
+def _batched(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _value(row: dict, key: str, default: int) -> int:
+    # 0 is a real state and prio; only a missing or empty value is defaulted.
+    value = row.get(key)
+    return default if value is None or value == '' else int(value)
+
+
+def read_rows(stream, format: str = 'jsonl'):
+    if format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def format_rows(rows, format: str = 'jsonl'):
+    if format == 'csv':
+        writer = csv.DictWriter(_Echo(), fieldnames=FIELDS)
+        yield writer.writeheader()
+        for row in rows:
+            yield writer.writerow(row)
+        return
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+def import_rows(rows, batch_size: int = 1000) -> int:
+    imported = 0
+    for batch in _batched(rows, batch_size):
+        names = {row['list'] for row in batch}
+        with transaction.atomic():
+            List.objects.bulk_create([List(name=name) for name in names],
+                                     ignore_conflicts=True)
+            list_ids = dict(List.objects.filter(name__in=names)
+                                        .values_list('name', 'id'))
+            items = []
+            for row in batch:
+                state = Item.ItemState(_value(row, 'state',
+                                              Item.ItemState.OPEN))
+                prio = Item.ItemPrio(_value(row, 'prio', Item.ItemPrio.LOW))
+                items.append(Item(list_id=list_ids[row['list']],
+                                  text=row.get('text', ''),
+                                  state=state, prio=prio))
+            Item.objects.bulk_create(items)
+        imported += len(items)
+    return imported
+
+
+def export_rows(items=None, chunk_size: int = EXPORT_CHUNK_SIZE):
+    items = Item.objects.all() if items is None else items
+    values = items.order_by('list', 'id').values_list('list__name', 'text',
+                                                     'state', 'prio')
+    for row in values.iterator(chunk_size=chunk_size):
+        yield dict(zip(FIELDS, row))
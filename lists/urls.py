@@ -16,15 +16,36 @@ Including another URLconf
 from django.urls import path
 from lists import views
 
-urlpatterns = [
-    path('new', views.new_list, name='new_list'),
-    path('new_form', views.new_list_form, name='new_list_form'),
-    path('<int:list_id>/', views.view_list, name='view_list'),
-    path('<int:list_id>/add_item', views.add_item, name='add_item'),
-    path('<int:list_id>/add_item_form', views.add_item_form,name='add_item_form'),
-    path('<int:list_id>/<int:item_id>/state_up', views.state_up, name='state_up'),
-    path('<int:list_id>/<int:item_id>/state_down', views.state_down,
-         name='state_down'),
-    path('<int:list_id>/<int:item_id>/delete_item', views.delete_item,
-         name='delete_item'),
-]
+
+def url_patterns(views):
+    # Shared by lists.async_urls, which passes lists.async_views instead.
+    # Streaming views a module does not provide are left out.
+    patterns = [
+        path('new', views.new_list, name='new_list'),
+        path('new_form', views.new_list_form, name='new_list_form'),
+        path('search', views.search_items, name='search_items'),
+        path('<int:list_id>/', views.view_list, name='view_list'),
+        path('<int:list_id>/add_item', views.add_item, name='add_item'),
+        path('<int:list_id>/add_item_form', views.add_item_form,name='add_item_form'),
+        path('<int:list_id>/<int:item_id>/state_up', views.state_up, name='state_up'),
+        path('<int:list_id>/<int:item_id>/state_down', views.state_down,
+             name='state_down'),
+        path('<int:list_id>/<int:item_id>/delete_item', views.delete_item,
+             name='delete_item'),
+        path('<int:list_id>/<int:item_id>/move', views.move_item,
+             name='move_item'),
+        path('<int:list_id>/bulk_update', views.bulk_update_items,
+             name='bulk_update_items'),
+    ]
+    if hasattr(views, 'list_events'):
+        patterns.append(path('<int:list_id>/events', views.list_events,
+                             name='list_events'))
+    if hasattr(views, 'export_items'):
+        patterns += [
+            path('export', views.export_items, name='export_items'),
+            path('<int:list_id>/export', views.export_items,
+                 name='export_list'),
+        ]
+    return patterns
+
+urlpatterns = url_patterns(views)
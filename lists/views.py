@@ -1,28 +1,203 @@
+import threading
+from functools import wraps
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
 from django.shortcuts import render, redirect
-from django.http import HttpResponse
+from django.template.loader import get_template, render_to_string
+from django.db import connection, transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_POST
+from django.http import (HttpResponse, HttpResponseBadRequest,
+                         StreamingHttpResponse)
+from lists import events
+from lists.instrumentation import query_budget
 from lists.models import Item, List
+from lists.transfer import FORMATS, export_rows, format_rows
+
+OVERVIEW = {'count': Count('id'), 'last_modified': Max('updated_at')}
+STREAM_CHUNK_SIZE = 200
+
+def _not_modified(request, etag: str, last_modified):
+    # A 304 for requests whose validators still match, answered before any
+    # template is rendered.
+    return get_conditional_response(
+        request, etag=etag,
+        last_modified=last_modified and int(last_modified.timestamp()))
+
+def _set_validators(response, etag: str, last_modified):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Pollers must revalidate rather than rely on heuristic freshness.
+    patch_cache_control(response, no_cache=True)
+    return response
+
+def _page_params(request):
+    # Raises ValueError for a malformed page size or cursor.
+    prefix = request.GET.get('q') or None
+    after = request.GET.get('after') or None
+    size = int(request.GET.get('page_size', settings.LISTS_PAGE_SIZE))
+    if after is not None and prefix is None:
+        after = int(after)
+    return max(1, min(size, settings.LISTS_MAX_PAGE_SIZE)), after, prefix
+
+def _overview_validators(overview: dict):
+    # Every item write bumps its list's updated_at, and deleting a list
+    # changes the count, so this pair covers all the overview shows.
+    last_modified = overview['last_modified']
+    etag = quote_etag(f"{overview['count']}-"
+                      f"{last_modified and last_modified.timestamp()}")
+    return etag, last_modified
+
+def _render_home(request, lists: list, next_cursor, size: int, prefix: str):
+    return render(request, 'home.html', {'lists': lists,
+                                         'next_cursor': next_cursor,
+                                         'page_size': size,
+                                         'q': prefix or ''})
+
+def _items_table_key(list_: List) -> str:
+    # The rendered item table only changes when the list version is bumped.
+    return f'lists:items_table:{list_.id}:{list_.version}'
+
+def _render_items_table(list_: List, items_by_state: dict) -> str:
+    filtered_items = {Item.ItemState(state).label: items for state, items
+                      in items_by_state.items()}
+    return render_to_string('list_items.html',
+                            {'list': list_, 'filtered_items': filtered_items})
+
+def _items_table(list_: List) -> str:
+    key = _items_table_key(list_)
+    items_table = cache.get(key)
+    if items_table is None:
+        items_table = _render_items_table(list_, list_.items_by_state())
+        cache.set(key, items_table, settings.LISTS_FRAGMENT_CACHE_TIMEOUT)
+    return items_table
+
+def _list_etag(list_: List, variant: str = '') -> str:
+    return quote_etag(f'{list_.id}-{list_.version}{variant}')
+
+def _render_list(request, list_: List, items_table: str):
+    return render(request, 'list.html', {
+        'list': list_, 
+        'items_table': items_table,
+        'state_choices': Item.ItemState.choices,
+        'prio_choices': Item.ItemPrio.choices})
+
+def _stream_params(request):
+    # Raises ValueError for a malformed done_limit. Under ASGI the page is
+    # never streamed: Django iterates streaming content in the event loop,
+    # where the item queries cannot run.
+    stream = request.GET.get('stream', '1' if settings.LISTS_STREAM_LIST
+                             else '0') != '0'
+    stream = stream and not isinstance(request, ASGIRequest)
+    done_limit = int(request.GET.get('done_limit',
+                                     settings.LISTS_STREAM_DONE_LIMIT or 0))
+    return stream, done_limit or None
+
+def _stream_list(request, list_: List, done_limit: int = None):
+    # The page is rendered once with an empty marker per state column and
+    # sent up to the first marker before any item is read. Each column is
+    # then filled from its own iterator query in chunks, so neither the
+    # items nor the page are held in memory as a whole. The page itself is
+    # rendered here, before the response goes through the middleware, so
+    # the CSRF cookie for its form gets set.
+    states = [state for state in Item.ItemState.values
+              if state != Item.ItemState.DELETED]
+    items_table = render_to_string('list_items.html', {
+        'list': list_, 'streaming': True,
+        'filtered_items': {Item.ItemState(state).label: []
+                           for state in states}})
+    pieces = _render_list(request, list_, items_table).content.decode().split(
+        '<!--items-->')
+    return _stream_items(list_, states, pieces, done_limit)
+
+def _batched(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+def _stream_items(list_: List, states: list, pieces: list,
+                  done_limit: int = None):
+    boxes = get_template('list_item_boxes.html')
+    yield pieces[0]
+    for state_id, (state, piece) in enumerate(zip(states, pieces[1:]), 1):
+        limit = done_limit if state == Item.ItemState.DONE else None
+        items = list_.item_set.filter(state=state).exclude(
+            state=Item.ItemState.DELETED)
+        if limit is not None:
+            items = items[:limit + 1]
+        offset, more = 0, False
+        for chunk in _batched(items.iterator(chunk_size=STREAM_CHUNK_SIZE),
+                              STREAM_CHUNK_SIZE):
+            if limit is not None and offset + len(chunk) > limit:
+                chunk, more = chunk[:limit - offset], True
+            yield boxes.render({'list': list_, 'items': chunk,
+                                'state_id': state_id, 'offset': offset})
+            offset += len(chunk)
+        if more:
+            yield render_to_string('list_load_more.html', {
+                'list': list_, 'state_id': state_id,
+                'done_limit': limit * 2})
+        yield piece
+
+def _rebalance_later(list_id: int, item_id: int):
+    # Shortens the rank keys of the item's column off the request path. The
+    # order stays the same, so the list version is left alone.
+    def rebalance():
+        try:
+            state = (Item.objects.filter(id=item_id)
+                                 .values_list('state', flat=True).first())
+            if state is not None:
+                Item.objects.rebalance(list_id, state)
+        finally:
+            connection.close()
+    transaction.on_commit(
+        lambda: threading.Thread(target=rebalance, daemon=True).start())
 
 # Create your views here.
+@query_budget(2)
 def home_page(request):
-    lists = List.objects.all()
-    return render(request, 'home.html', {'lists': lists})
+    try:
+        size, after, prefix = _page_params(request)
+    except ValueError:
+        return HttpResponseBadRequest('Invalid page_size or cursor')
+    etag, last_modified = _overview_validators(
+        List.objects.aggregate(**OVERVIEW))
+    response = _not_modified(request, etag, last_modified)
+    if response is None:
+        lists, next_cursor = List.objects.with_item_counts().page(
+            size, after=after, prefix=prefix)
+        response = _render_home(request, lists, next_cursor, size, prefix)
+    return _set_validators(response, etag, last_modified)
 
+@query_budget(2)
 def view_list(request, list_id: int):
+    try:
+        stream, done_limit = _stream_params(request)
+    except ValueError:
+        return HttpResponseBadRequest('Invalid done_limit')
     list_ = List.objects.get(id=list_id)
-    open_items = list_.item_set.filter(state=3)
-    filtered_items = [list_.item_set.filter(state=_state) for _state in
-                      range(1,4)]
-    states = ['Open','In Progress','Done']
-    filtered_items = dict(zip(states, filtered_items))
-    return render(request, 'list.html', {'list': list_, 
-                                         'filtered_items': filtered_items,
-                                         'states': states})
+    # A streamed page may cap the done items, so it gets its own validator.
+    etag = _list_etag(list_, f'-stream-{done_limit}' if stream else '')
+    response = _not_modified(request, etag, list_.updated_at)
+    if response is None and stream:
+        response = StreamingHttpResponse(
+            _stream_list(request, list_, done_limit))
+    elif response is None:
+        response = _render_list(request, list_, _items_table(list_))
+    return _set_validators(response, etag, list_.updated_at)
 
 def new_list_form(request):
     if request.GET.get('new_list_submit'):
         return redirect('/lists/new')
     return render(request, 'new_form_list.html')
 
+@query_budget(1)
 def new_list(request):
     list_ = List.objects.create(name=request.POST['list_name'])
     return redirect(f'/lists/{list_.id}/')
@@ -34,29 +209,116 @@ def add_item_form(request, list_id: int):
     return render(request, 'new_form_item.html', {'list_id': list_id,
                                                   'prios_choice': prios_choice})
 
+@query_budget(3)
 def add_item(request, list_id: int):
     list_ = List.objects.get(id=list_id)
-    prio_ = int(request.POST['prio_id'])
+    prio_ = int(request.POST.get('prio_id', Item.ItemPrio.LOW))
     name = request.POST['item_text']
-    Item.objects.create(text=name,
-                        prio=prio_,
-                        list=list_)
+    item = Item.objects.create(text=name,
+                               prio=prio_,
+                               list=list_)
+    events.publish(list_.id, 'add', item=events.item_data(item))
     return redirect(f'/lists/{list_.id}/')
 
+@query_budget(2)
 def state_up(request, list_id: int, item_id: int):
-    item = Item.objects.get(id=item_id)
-    item.state += 1
-    item.save()
+    if Item.objects.state_up(item_id, list_id):
+        events.publish(list_id, 'state_up', item_id=item_id)
     return redirect(f'/lists/{list_id}/')
 
+@query_budget(2)
 def state_down(request, list_id: int, item_id: int):
-    item = Item.objects.get(id=item_id)
-    item.state -= 1
-    item.save()
+    if Item.objects.state_down(item_id, list_id):
+        events.publish(list_id, 'state_down', item_id=item_id)
     return redirect(f'/lists/{list_id}/')
 
+@query_budget(3)
 def delete_item(request, list_id: int, item_id: int):
-    item = Item.objects.get(id=item_id)
-    item.state = 0
-    item.save()
+    if Item.objects.delete_item(item_id, list_id):
+        events.publish(list_id, 'delete_item', item_id=item_id)
+    return redirect(f'/lists/{list_id}/')
+
+@require_POST
+@query_budget(9)
+def move_item(request, list_id: int, item_id: int):
+    after = request.POST.get('after') or None
+    try:
+        after = None if after is None else int(after)
+        position = Item.objects.move(item_id, list_id, after)
+    except (ValueError, Item.DoesNotExist):
+        return HttpResponseBadRequest('Invalid item or after')
+    events.publish(list_id, 'move', item_id=item_id, after=after)
+    if len(position) > settings.LISTS_RANK_MAX_LENGTH:
+        _rebalance_later(list_id, item_id)
     return redirect(f'/lists/{list_id}/')
+
+@query_budget(3)
+def bulk_update_items(request, list_id: int):
+    state = request.POST.get('state') or None
+    prio = request.POST.get('prio') or None
+    if request.POST.get('delete'):
+        state = Item.ItemState.DELETED
+    try:
+        item_ids = [int(id_) for id_ in request.POST.getlist('item_ids')]
+        state = None if state is None else int(state)
+        prio = None if prio is None else int(prio)
+        changed = Item.objects.bulk_change(list_id, item_ids, state=state,
+                                           prio=prio)
+    except ValueError:
+        return HttpResponseBadRequest('Invalid item, state or prio')
+    if changed:
+        events.publish(list_id, 'bulk_update', item_ids=item_ids,
+                       state=state, prio=prio)
+    return redirect(f'/lists/{list_id}/')
+
+@query_budget(1)
+def search_items(request):
+    query = request.GET.get('q', '')
+    try:
+        list_id = int(request.GET['list']) if request.GET.get('list') else None
+        state = int(request.GET['state']) if request.GET.get('state') else None
+        size = int(request.GET.get('page_size', settings.LISTS_PAGE_SIZE))
+    except ValueError:
+        return HttpResponseBadRequest('Invalid list, state or page_size')
+    size = max(1, min(size, settings.LISTS_MAX_PAGE_SIZE))
+    items = Item.objects.search(query, list_id=list_id, state=state)
+    return render(request, 'search.html', {
+        'items': items.select_related('list')[:size],
+        'q': query,
+        'list_id': list_id,
+        'state': state,
+        'state_choices': Item.ItemState.choices})
+
+def _wsgi_only(view):
+    # For streaming views whose iterator queries the database or blocks.
+    # Django 4.1 iterates streaming content inside the event loop under
+    # ASGI, so these are refused there.
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if isinstance(request, ASGIRequest):
+            return HttpResponse('Only served under WSGI', status=501)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+@_wsgi_only
+def export_items(request, list_id: int = None):
+    format = request.GET.get('format', 'jsonl')
+    if format not in FORMATS:
+        return HttpResponseBadRequest(f'Unknown format {format}')
+    items = Item.objects.all()
+    if list_id is not None:
+        items = items.filter(list_id=list_id)
+    content_type = 'text/csv' if format == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(format_rows(export_rows(items), format),
+                                     content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="items.{format}"'
+    return response
+
+@_wsgi_only
+def list_events(request, list_id: int):
+    subscription = events.get_hub().subscribe(list_id)
+    response = StreamingHttpResponse(events.stream(subscription),
+                                     content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,16 @@
+from pathlib import Path
+
+from django.template import engines
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / 'templates'
+
+
+def warm_templates() -> list:
+    # Compiles every template of the app into each engine's cached loader,
+    # so the first request does not pay for parsing.
+    names = sorted(str(path.relative_to(TEMPLATE_DIR))
+                   for path in TEMPLATE_DIR.rglob('*.html'))
+    for engine in engines.all():
+        for name in names:
+            engine.get_template(name)
+    return names
@@ -0,0 +1,23 @@
+"""superlists URL Configuration for ASGI deployments
+
+Same routes as superlists.urls, but served by the async views in
+lists.async_views, except the item export and the live event stream,
+which stream from blocking code and need WSGI. Enable with
+ROOT_URLCONF = 'superlists.async_urls'.
+"""
+from django.contrib import admin
+from django.conf import settings
+from django.urls import path, include
+from lists import async_views as list_views
+from lists import async_urls as list_urls
+from lists import api_urls
+from lists.staticfiles import serve_static
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('', list_views.home_page, name='home'),
+    path('lists/', include(list_urls)), 
+    path('api/', include(api_urls)),
+    path(f'{settings.STATIC_URL.lstrip("/")}<path:path>', serve_static,
+         name='static'),
+]
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -23,7 +24,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-6%l!e$36z*_g#8%*k%ty=%p%bbp6k=36ue-ck#is%3daz-=agp'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('SUPERLISTS_DEBUG', '1') != '0'
 
 ALLOWED_HOSTS = ["192.168.178.30",
                 "127.0.0.1"]
@@ -49,9 +50,12 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Server-Timing headers and a JSON log line per request:
+    # 'lists.instrumentation.InstrumentationMiddleware',
 ]
 
 ROOT_URLCONF = 'superlists.urls'
+# Under ASGI use 'superlists.async_urls' to serve the async list views.
 
 TEMPLATES = [
     {
@@ -69,6 +73,17 @@ TEMPLATES = [
     },
 ]
 
+# Outside DEBUG, compiled templates are kept for the life of the process and
+# all templates of the lists app are compiled when the app is loaded.
+if not DEBUG:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+LISTS_TEMPLATE_WARMUP = not DEBUG
+
 WSGI_APPLICATION = 'superlists.wsgi.application'
 
 
@@ -82,6 +97,43 @@ DATABASES = {
     }
 }
 
+# Production profile, enabled with SUPERLISTS_DB_ENGINE=postgresql (needs
+# psycopg2). Connections are kept open for SUPERLISTS_DB_CONN_MAX_AGE seconds
+# and health-checked before reuse; statements are cancelled after
+# SUPERLISTS_DB_STATEMENT_TIMEOUT ms. QuerySet.iterator(), used by exports,
+# runs on server-side cursors here; set
+# SUPERLISTS_DB_DISABLE_SERVER_SIDE_CURSORS=1 behind a transaction-pooling
+# pgbouncer.
+if os.environ.get('SUPERLISTS_DB_ENGINE') == 'postgresql':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('SUPERLISTS_DB_NAME', 'superlists'),
+        'USER': os.environ.get('SUPERLISTS_DB_USER', ''),
+        'PASSWORD': os.environ.get('SUPERLISTS_DB_PASSWORD', ''),
+        'HOST': os.environ.get('SUPERLISTS_DB_HOST', ''),
+        'PORT': os.environ.get('SUPERLISTS_DB_PORT', ''),
+        'CONN_MAX_AGE': int(os.environ.get('SUPERLISTS_DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get(
+            'SUPERLISTS_DB_DISABLE_SERVER_SIDE_CURSORS', '0') == '1',
+        'OPTIONS': {
+            'options': '-c statement_timeout=%d' % int(os.environ.get(
+                'SUPERLISTS_DB_STATEMENT_TIMEOUT', 30000)),
+        },
+    }
+
+
+# Applied to every new SQLite connection by lists.db. WAL lets readers run
+# alongside a writer; busy_timeout (ms) makes writers wait for the lock
+# instead of failing with "database is locked". An empty dict disables it.
+LISTS_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 134217728,
+    'temp_store': 'MEMORY',
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -118,6 +170,59 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/4.1/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'static'
+
+# Outside DEBUG, collectstatic writes content-hashed names plus gzip (and,
+# with the brotli package, brotli) copies, served by lists.staticfiles.
+if not DEBUG:
+    STATICFILES_STORAGE = ('lists.staticfiles.'
+                           'CompressedManifestStaticFilesStorage')
+
+# Caches
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# Rendered list item tables are cached per list version. To share them between
+# processes switch to e.g. the file-based or a memcached backend:
+#   'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+#   'LOCATION': '/var/tmp/superlists_cache',
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+LISTS_FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Live list updates (Server-Sent Events). LocalHub reaches only streams served
+# by the same process.
+LISTS_EVENT_HUB = 'lists.events.LocalHub'
+LISTS_EVENT_HEARTBEAT = 15
+
+# Home page list overview, paginated by keyset
+LISTS_PAGE_SIZE = 50
+LISTS_MAX_PAGE_SIZE = 500
+
+# Stream list pages column by column (or per request with ?stream=1). Done
+# items beyond the limit are behind a "Load more" link, None shows them all.
+LISTS_STREAM_LIST = False
+LISTS_STREAM_DONE_LIMIT = 500
+
+# Rank keys of manually ordered items longer than this get their column
+# rebalanced in the background.
+LISTS_RANK_MAX_LENGTH = 16
+
+# Item state history (lists.history). The buffered writer inserts the log in
+# batches; 'lists.history.SyncWriter' inserts every transition right away.
+LISTS_HISTORY_WRITER = 'lists.history.BufferedWriter'
+LISTS_HISTORY_FLUSH_SIZE = 100
+LISTS_HISTORY_FLUSH_INTERVAL = 1.0
+
+# Runs the tests with the synchronous history writer.
+TEST_RUNNER = 'lists.testing.TestRunner'
+
+# Deleted items older than this are moved to the archive table by
+# `manage.py archive_items`.
+LISTS_ARCHIVE_AFTER_DAYS = 90
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
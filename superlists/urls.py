@@ -14,12 +14,18 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
+from django.conf import settings
 from django.urls import path, include
 from lists import views as list_views
 from lists import urls as list_urls
+from lists import api_urls
+from lists.staticfiles import serve_static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', list_views.home_page, name='home'),
     path('lists/', include(list_urls)), 
+    path('api/', include(api_urls)),
+    path(f'{settings.STATIC_URL.lstrip("/")}<path:path>', serve_static,
+         name='static'),
 ]